@@ -1,15 +1,45 @@
-from ._create_dto import create_dto
-from ._create_entity import create_entity
-from ._create_enum import create_enum
-from ._create_table import create_table
-from ._update_imports import update_imports
-from .create_api import create_api
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ._create_dto import create_dto
+    from ._create_entity import create_entities, create_entity
+    from ._create_enum import create_enum
+    from ._create_table import create_table
+    from ._import_database import import_database
+    from ._update_imports import update_imports
+    from .create_api import create_api, create_apis, load_projects
 
 __all__ = [
     "create_api",
+    "create_apis",
+    "load_projects",
     "create_enum",
     "create_table",
     "create_dto",
     "create_entity",
+    "create_entities",
+    "import_database",
     "update_imports",
 ]
+
+# each command loads only its own module, so a light command does not pull
+# SQLAlchemy, gyver.database and jinja2 in through its siblings
+_lazy_exports = {
+    "create_api": ".create_api",
+    "create_apis": ".create_api",
+    "load_projects": ".create_api",
+    "create_enum": "._create_enum",
+    "create_table": "._create_table",
+    "create_dto": "._create_dto",
+    "create_entity": "._create_entity",
+    "create_entities": "._create_entity",
+    "import_database": "._import_database",
+    "update_imports": "._update_imports",
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy_exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_lazy_exports[name], __name__), name)
@@ -187,6 +187,20 @@ class ApiStructure:
                 )
             )
 
+    def create_providers_test_file(self):
+        file = self.files.create_file(
+            files.Files.python_file(f"test_{self.providers_folder}"), self.test_folder
+        )
+        with self._get_file_stream(file) as stream:
+            stream.write(
+                strings.TEST_HTTP_PROVIDER.format(
+                    project_folder=self.project_folder,
+                    core_folder=self.core_folder,
+                    exceptions_folder=self.exceptions_folder,
+                    providers_folder=self.providers_folder,
+                )
+            )
+
     def create_utils_test_file(self):
         file = self.files.create_file(
             files.Files.python_file(f"test_{self.utils_folder}"), self.test_folder
@@ -588,6 +602,7 @@ class ApiStructure:
         structure.create_test_folder()
         structure.create_base_test_file()
         structure.add_test_to_base_test_file()
+        structure.create_providers_test_file()
 
         # Providers
         structure.create_providers_folder()
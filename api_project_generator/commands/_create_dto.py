@@ -15,6 +15,7 @@ def create_dto(dto_module: str, dto_name: str):
     dto_file, dunder_file = mod.retrieve_or_exit()
     typer.echo(typer.style("Escrevendo arquivo do DTO"))
     write_dto_file(dto_file, dtos_dir.parent, dto_name)
+    functions.register_created(dtos_dir.parent, "dtos", dto_name, dto_module)
     typer.echo(typer.style("Atualizando diretório"))
     functions.update_dunder_file(dunder_file, functions.camel_public_name_parser)
 
@@ -1,7 +1,14 @@
 import pathlib
+import textwrap
+from typing import Any
 
 import typer
+from gyver.utils import json
 
+from api_project_generator.core.config import get_config
+from api_project_generator.core.files import write_files
+from api_project_generator.core.locator import loads_toml
+from api_project_generator.core.manifest import ProjectManifest, load_manifest
 from api_project_generator.helpers import files, functions, module_file, strings
 
 from ._create_dto import write_dto_file
@@ -30,9 +37,29 @@ def create_entity(module: str, name: str, sync: bool):
         raise typer.Exit(0)
     else:
         _create_routes(module, name, project_folder, sync)
+    _register_entity(module, name, project_folder)
     typer.echo("Entidade criada, execute 'api-project update:imports")
 
 
+def _register_entity(module: str, name: str, project_folder: pathlib.Path):
+    manifest = load_manifest(project_folder, seed=True)
+    if manifest is None:
+        return
+    _register_entity_in(manifest, module, name)
+    manifest.save()
+
+
+def _register_entity_in(manifest: ProjectManifest, module: str, name: str):
+    for item in [name, f"{name}-in", f"{name}-edit", f"{name}-embed-array"]:
+        manifest.register(
+            "dtos", functions.to_snake(functions.clean_name(item)), module
+        )
+    entity = functions.to_snake(functions.clean_name(name))
+    manifest.register("repositories", entity)
+    manifest.register("routers", entity, module)
+    manifest.register("entities", entity, module)
+
+
 def _create_table(module: str, name: str):
     try:
         create_table(module, name)
@@ -142,3 +169,208 @@ def _create_routes(module: str, name: str, project_folder: pathlib.Path, sync: b
                     entity_name=functions.to_camel(entity_snake_case),
                 )
             )
+
+
+SCHEMA_FIELDS = {"module", "name", "sync"}
+
+
+def read_schema(path: pathlib.Path) -> list[dict[str, Any]]:
+    """
+    Reads the entities of a schema file, a list of `module`, `name` and an
+    optional `sync` either at the top level or under `entities`.
+
+    YAML schemas need the `PyYAML` package, JSON and TOML ones do not.
+    """
+    text = path.read_text()
+    suffix = path.suffix.lower()
+    if suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as err:
+            raise ValueError(
+                "Reading YAML schemas requires the 'PyYAML' package, "
+                "use a JSON or TOML schema instead"
+            ) from err
+        data = yaml.safe_load(text)
+    elif suffix == ".json":
+        data = json.loads(text)
+    elif suffix == ".toml":
+        data = loads_toml(text)
+    else:
+        raise ValueError(f"Unsupported schema format: {path.suffix or path.name}")
+    entities = data.get("entities", []) if isinstance(data, dict) else data
+    if not isinstance(entities, list):
+        raise ValueError("The schema must hold a list of entities")
+    return entities
+
+
+def load_schema(path: pathlib.Path, sync: bool) -> list[tuple[str, str, bool]]:
+    entities = []
+    for position, record in enumerate(read_schema(path), 1):
+        if not isinstance(record, dict):
+            raise ValueError(f"Invalid entity #{position}: expected a mapping")
+        if unknown := sorted(record.keys() - SCHEMA_FIELDS):
+            raise ValueError(
+                f"Invalid entity #{position}: unknown fields {', '.join(unknown)}"
+            )
+        if not record.get("module") or not record.get("name"):
+            raise ValueError(
+                f"Invalid entity #{position}: module and name are required"
+            )
+        entities.append(
+            (str(record["module"]), str(record["name"]), bool(record.get("sync", sync)))
+        )
+    names = [functions.to_snake(functions.clean_name(name)) for _, name, _ in entities]
+    if duplicated := sorted({name for name in names if names.count(name) > 1}):
+        raise ValueError(f"Duplicated entities: {', '.join(duplicated)}")
+    return entities
+
+
+def render_entity(
+    project_folder: pathlib.Path, module: str, name: str, sync: bool
+) -> dict[pathlib.Path, str]:
+    """
+    Renders the files `create_entity` writes for one entity, by path.
+    """
+    entity_snake_case = functions.to_snake(functions.clean_name(name))
+    entity_name = functions.to_camel(entity_snake_case)
+    dtos_dir = project_folder / "dtos" / module
+    rendered = {}
+    for item in [name, f"{name}-in", f"{name}-edit"]:
+        dto_snake_case = functions.to_snake(functions.clean_name(item))
+        rendered[
+            dtos_dir / files.Files.python_file(dto_snake_case, private=True)
+        ] = strings.DTO_TEMPLATE.format(
+            project_folder=project_folder.name,
+            dto_name=functions.to_camel(dto_snake_case),
+        )
+    rendered[
+        dtos_dir
+        / files.Files.python_file(f"{entity_snake_case}_embed_array", private=True)
+    ] = strings.BASE_EMBED_ARRAY_BOILERPLATE.format(
+        project_folder=project_folder.name,
+        entity_lower=entity_snake_case,
+        entity_name=entity_name,
+    )
+    entity_file = files.Files.python_file(entity_snake_case, private=True)
+    rendered[
+        project_folder / "database" / "tables" / module / entity_file
+    ] = strings.TABLE_TEMPLATE.format(
+        project_folder=project_folder.name,
+        table_normalized_name=entity_snake_case,
+        table_name=name,
+    )
+    rendered[project_folder / "database" / "repositories" / entity_file] = (
+        strings.SYNC_REPOSITORY_BOILERPLATE
+        if sync
+        else strings.ASYNC_REPOSITORY_BOILERPLATE
+    ).format(
+        project_folder=project_folder.name,
+        module_name=module,
+        table_name=entity_snake_case,
+        entity_name=entity_name,
+    )
+    rendered[project_folder / "routes" / module / entity_file] = (
+        strings.SYNC_ROUTE_BOILERPLATE if sync else strings.ASYNC_ROUTE_BOILERPLATE
+    ).format(
+        project_folder=project_folder.name,
+        module_name=module,
+        entity_lower=entity_snake_case,
+        entity_name=entity_name,
+    )
+    return rendered
+
+
+def find_scaffold_project() -> pathlib.Path:
+    """
+    Returns the project folder for the bulk scaffolds, which need the
+    database metadata to exist.
+    """
+    curdir = functions.get_curdir()
+    db_dir = functions.find_directory(curdir, "database")
+    if not db_dir:
+        typer.echo(typer.style("Diretório do projeto não foi encontrado"))
+        raise typer.Exit()
+    if not (db_dir / files.Files.python_file("metadata")).exists():
+        typer.echo("Arquivo de metadata não encontrado")
+        raise typer.Exit()
+    return db_dir.parent
+
+
+def write_scaffold(
+    project_folder: pathlib.Path,
+    rendered: dict[pathlib.Path, str],
+    max_workers: int = 8,
+):
+    """
+    Writes the rendered files concurrently and regenerates each affected
+    `__init__.py` once by parsing the modules, so the project environment is
+    never needed. Nothing is written when one of the files already exists.
+    """
+    from ._update_imports import get_module_index, list_packages, update_packages
+
+    if existing := sorted(path for path in rendered if path.exists()):
+        typer.echo(
+            typer.style(
+                "{count} arquivos já existem: {files}".format(
+                    count=len(existing),
+                    files=textwrap.shorten(
+                        ", ".join(
+                            path.relative_to(project_folder).as_posix()
+                            for path in existing
+                        ),
+                        200,
+                    ),
+                ),
+                fg=typer.colors.RED,
+            )
+        )
+        raise typer.Exit(1)
+    dunder = files.Files.python_file("init", dunder=True)
+    folders = {path.parent for path in rendered}
+    for folder in sorted(folders):
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / dunder).touch()
+    write_files(
+        [(path, contents.encode()) for path, contents in rendered.items()],
+        max_workers,
+    )
+    index = get_module_index(project_folder)
+    update_packages(
+        [
+            package
+            for package in list_packages(project_folder)
+            if package.dunder_file.parent in folders
+        ],
+        project_folder,
+        index,
+    )
+    index.save()
+
+
+def create_entities(schema: pathlib.Path, sync: bool):
+    """
+    Scaffolds every entity of `schema` in one pass, see `write_scaffold`.
+    """
+    project_folder = find_scaffold_project()
+    try:
+        entities = load_schema(schema, sync)
+    except ValueError as err:
+        typer.echo(typer.style(str(err), fg=typer.colors.RED))
+        raise typer.Exit(1) from err
+    rendered: dict[pathlib.Path, str] = {}
+    for module, name, entity_sync in entities:
+        rendered |= render_entity(project_folder, module, name, entity_sync)
+    write_scaffold(project_folder, rendered, get_config().max_concurrency)
+    typer.echo(
+        typer.style(f"{len(rendered)} arquivos escritos para {len(entities)} entidades")
+    )
+    manifest = load_manifest(project_folder, seed=True)
+    if manifest is not None:
+        for module, name, _ in entities:
+            _register_entity_in(manifest, module, name)
+            manifest.register(
+                "tables", functions.to_snake(functions.clean_name(name)), module
+            )
+        manifest.save()
+    typer.echo(f"{len(entities)} entidades criadas")
@@ -16,6 +16,7 @@ def create_enum(enum_name: str, auto_opts: Optional[list[str]]):
     enum_file, dunder_file = mod.retrieve_or_exit()
     typer.echo(typer.style("Escrevendo arquivo do Enum"))
     write_enum_file(enum_file, enum_name, auto_opts)
+    functions.register_created(dtos_dir.parent, "enums", enum_name)
     typer.echo(typer.style("Atualizando diretório"))
     functions.update_dunder_file(dunder_file, functions.camel_public_name_parser)
 
@@ -21,6 +21,9 @@ def create_table(table_module: str, table_name: str):
     table_file, dunder_file = mod.retrieve_or_exit()
     typer.echo(typer.style("Escrevendo arquivo da tabela"))
     write_table_file(table_file, tables_dir.parent.parent, table_name)
+    functions.register_created(
+        tables_dir.parent.parent, "tables", table_name, table_module
+    )
     typer.echo(typer.style("Atualizando diretório"))
     functions.update_dunder_file(dunder_file)
 
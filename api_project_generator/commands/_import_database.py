@@ -0,0 +1,445 @@
+import datetime
+import fnmatch
+import json
+import keyword
+import pathlib
+import re
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+import typer
+
+from api_project_generator.core.config import get_config
+from api_project_generator.core.manifest import MODULE_KINDS, load_manifest
+from api_project_generator.helpers import files, functions, strings
+
+from ._create_entity import find_scaffold_project, write_scaffold
+
+if TYPE_CHECKING:
+    from sqlalchemy import Column, Table
+
+NAME_EXP = re.compile(r"\W")
+
+
+def resolve_dsn(dsn: str) -> str:
+    """
+    Accepts a path to a SQLite file besides database URLs.
+    """
+    if "://" in dsn:
+        return dsn
+    path = pathlib.Path(dsn)
+    if not path.is_file():
+        raise ValueError(f"Database file not found: {dsn}")
+    return f"sqlite:///{path.resolve()}"
+
+
+def literal(value: Any) -> str:
+    """
+    Renders `value` as a python literal, strings with double quotes.
+    """
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    return repr(value)
+
+
+def identifier(name: str) -> str:
+    name = NAME_EXP.sub("_", name)
+    if not name or name[0].isdigit():
+        name = f"_{name}"
+    return f"{name}_" if keyword.iskeyword(name) else name
+
+
+class TableRenderer:
+    """
+    Renders the table, dtos and repository files of a reflected table with
+    the conventions of `create:entity`.
+    """
+
+    def __init__(
+        self, project_folder: pathlib.Path, module: str, table: "Table", sync: bool
+    ) -> None:
+        self.project_folder = project_folder
+        self.module = module
+        self.table = table
+        self.sync = sync
+        self.entity_snake_case = identifier(
+            functions.to_snake(functions.clean_name(table.name))
+        )
+        self.entity_name = functions.to_camel(self.entity_snake_case)
+
+    @property
+    def has_id(self) -> bool:
+        # the repository boilerplate looks rows up by an integer `id`
+        primary_key = list(self.table.primary_key.columns)
+        return (
+            len(primary_key) == 1
+            and primary_key[0].name == "id"
+            and self.python_type(primary_key[0])[0] == "int"
+        )
+
+    def render(self) -> dict[pathlib.Path, str]:
+        entity_file = files.Files.python_file(self.entity_snake_case, private=True)
+        dtos_dir = self.project_folder / "dtos" / self.module
+        rendered = {
+            self.project_folder
+            / "database"
+            / "tables"
+            / self.module
+            / entity_file: self.render_table(),
+            dtos_dir / entity_file: self.render_dto(self.entity_name, "all"),
+            dtos_dir
+            / files.Files.python_file(
+                f"{self.entity_snake_case}_in", private=True
+            ): self.render_dto(f"{self.entity_name}In", "in"),
+            dtos_dir
+            / files.Files.python_file(
+                f"{self.entity_snake_case}_edit", private=True
+            ): self.render_dto(f"{self.entity_name}Edit", "edit"),
+            dtos_dir
+            / files.Files.python_file(
+                f"{self.entity_snake_case}_embed_array", private=True
+            ): strings.BASE_EMBED_ARRAY_BOILERPLATE.format(
+                project_folder=self.project_folder.name,
+                entity_lower=self.entity_snake_case,
+                entity_name=self.entity_name,
+            ),
+        }
+        if self.has_id:
+            rendered[
+                self.project_folder / "database" / "repositories" / entity_file
+            ] = (
+                strings.SYNC_REPOSITORY_BOILERPLATE
+                if self.sync
+                else strings.ASYNC_REPOSITORY_BOILERPLATE
+            ).format(
+                project_folder=self.project_folder.name,
+                module_name=self.module,
+                table_name=self.entity_snake_case,
+                entity_name=self.entity_name,
+            )
+        return rendered
+
+    def sqlalchemy_type(self, column: "Column", imports: dict[str, set[str]]) -> str:
+        import sqlalchemy
+
+        try:
+            generic = column.type.as_generic()
+        except NotImplementedError:
+            generic = None
+        if generic is not None and getattr(
+            sqlalchemy, type(generic).__name__, None
+        ) is type(generic):
+            imports["sqlalchemy"].add(type(generic).__name__)
+            return repr(generic)
+        # no generic equivalent, keep the dialect type without its arguments
+        kind = type(column.type)
+        imports.setdefault(kind.__module__, set()).add(kind.__name__)
+        return f"{kind.__name__}()"
+
+    def render_column(self, column: "Column", imports: dict[str, set[str]]) -> str:
+        arguments = [literal(column.name), self.sqlalchemy_type(column, imports)]
+        foreign_keys = [
+            key
+            for key in column.foreign_keys
+            if len(key.constraint.columns) == 1  # type: ignore
+        ]
+        for key in foreign_keys:
+            imports["sqlalchemy"].add("ForeignKey")
+            options = "".join(
+                f", {option}={literal(value)}"
+                for option, value in (
+                    ("ondelete", key.ondelete),
+                    ("onupdate", key.onupdate),
+                )
+                if value
+            )
+            arguments.append(f"ForeignKey({literal(key.target_fullname)}{options})")
+        if column.primary_key:
+            arguments.append("primary_key=True")
+        elif not column.nullable:
+            arguments.append("nullable=False")
+        if column.server_default is not None:
+            default = getattr(column.server_default, "arg", None)
+            if default is not None:
+                imports["sqlalchemy"].add("text")
+                arguments.append(
+                    f"server_default=text({literal(str(getattr(default, 'text', default)))})"
+                )
+        if column.comment:
+            arguments.append(f"comment={literal(column.comment)}")
+        imports["sqlalchemy"].add("Column")
+        return "Column({})".format(", ".join(arguments))
+
+    def render_constraints(self, imports: dict[str, set[str]]) -> Iterable[str]:
+        from sqlalchemy.schema import (
+            ForeignKeyConstraint,
+            PrimaryKeyConstraint,
+            UniqueConstraint,
+        )
+
+        for constraint in sorted(
+            self.table.constraints, key=lambda item: str(item.name or "")
+        ):
+            columns = ", ".join(literal(column.name) for column in constraint.columns)
+            name = f", name={literal(constraint.name)}" if constraint.name else ""
+            if isinstance(constraint, PrimaryKeyConstraint):
+                continue
+            if isinstance(constraint, UniqueConstraint):
+                imports["sqlalchemy"].add("UniqueConstraint")
+                yield f"UniqueConstraint({columns}{name})"
+            elif (
+                isinstance(constraint, ForeignKeyConstraint)
+                and len(constraint.columns) > 1
+            ):
+                imports["sqlalchemy"].add("ForeignKeyConstraint")
+                targets = ", ".join(
+                    literal(element.target_fullname) for element in constraint.elements
+                )
+                yield f"ForeignKeyConstraint([{columns}], [{targets}]{name})"
+        for index in sorted(self.table.indexes, key=lambda item: str(item.name)):
+            imports["sqlalchemy"].add("Index")
+            columns = ", ".join(literal(column.name) for column in index.columns)
+            unique = ", unique=True" if index.unique else ""
+            yield f"Index({literal(index.name)}, {columns}{unique})"
+
+    def render_table(self) -> str:
+        imports: dict[str, set[str]] = {"sqlalchemy": {"Table"}}
+        items = [literal(self.table.name), "metadata"]
+        items.extend(
+            self.render_column(column, imports) for column in self.table.columns
+        )
+        items.extend(self.render_constraints(imports))
+        if self.table.schema:
+            items.append(f"schema={literal(self.table.schema)}")
+        lines = [
+            render_import(module, names) for module, names in sorted(imports.items())
+        ]
+        lines.append(
+            f"from {self.project_folder.name}.database.metadata import metadata"
+        )
+        body = "".join(f"    {item},\n" for item in items)
+        return "{imports}\n\n{name} = Table(\n{body})\n".format(
+            imports="\n".join(lines), name=self.entity_snake_case, body=body
+        )
+
+    def python_type(self, column: "Column") -> tuple[str, Optional[str]]:
+        """
+        Returns the annotation of `column` and the module it needs imported.
+        """
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return "typing.Any", "typing"
+        if python_type is object:
+            return "typing.Any", "typing"
+        if python_type.__module__ == "builtins":
+            return python_type.__name__, None
+        return (
+            f"{python_type.__module__}.{python_type.__qualname__}",
+            python_type.__module__,
+        )
+
+    def render_dto(self, dto_name: str, kind: str) -> str:
+        """
+        Renders a DTO with every column for `all`, without generated keys and
+        with optional defaults for `in`, and with every field optional but the
+        primary key left out for `edit`.
+        """
+        imports: set[str] = set()
+        fields = []
+        uses_field = False
+        for column in self.table.columns:
+            if kind == "in" and column is self.table.autoincrement_column:
+                continue
+            if kind == "edit" and column.primary_key:
+                continue
+            annotation, module = self.python_type(column)
+            if module:
+                imports.add(module)
+            optional = (
+                kind == "edit"
+                or (column.nullable and not column.primary_key)
+                or (kind == "in" and column.server_default is not None)
+            )
+            name = identifier(column.name)
+            if optional:
+                imports.add("typing")
+                annotation = f"typing.Optional[{annotation}]"
+            if name != column.name:
+                # renamed columns keep their name as the alias
+                default = "None, " if optional else ""
+                fields.append(
+                    f"{name}: {annotation} = Field({default}alias={literal(column.name)})"
+                )
+                uses_field = True
+            elif optional:
+                fields.append(f"{name}: {annotation} = None")
+            else:
+                fields.append(f"{name}: {annotation}")
+        header = "".join(f"import {module}\n" for module in sorted(imports))
+        if uses_field:
+            header += "{spacing}from pydantic import Field\n".format(
+                spacing="\n" if header else ""
+            )
+        return (
+            "{header}{spacing}from {project_folder}.dtos.base import DTO\n\n\n"
+            "class {dto_name}(DTO):\n"
+            '    """ Representation of {dto_name} """\n\n'
+            "{fields}"
+        ).format(
+            header=header,
+            spacing="\n" if header else "",
+            project_folder=self.project_folder.name,
+            dto_name=dto_name,
+            fields="".join(f"    {field}\n" for field in fields) or "    pass\n",
+        )
+
+
+def render_import(module: str, names: Iterable[str]) -> str:
+    line = "from {module} import {names}".format(
+        module=module, names=", ".join(sorted(names))
+    )
+    if len(line) <= 88:
+        return line
+    return "from {module} import (\n{names})".format(
+        module=module, names="".join(f"    {name},\n" for name in sorted(names))
+    )
+
+
+def batched(items: list[str], size: int) -> Iterable[list[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def reflect_tables(
+    url: str,
+    schema: Optional[str] = None,
+    patterns: Optional[list[str]] = None,
+    batch_size: int = 100,
+) -> Iterable["Table"]:
+    """
+    Reflects the tables of the database `batch_size` at a time, foreign keys
+    keep their targets as names instead of reflecting the referred tables.
+
+    :param url: The database URL, its driver must be synchronous.
+    :param schema: The schema to reflect, the default one when missing.
+    :param patterns: Glob patterns the table names must match, all when empty.
+    :param batch_size: How many tables each reflection query covers.
+    """
+    from sqlalchemy import MetaData, create_engine, inspect
+
+    engine = create_engine(url)
+    if engine.dialect.is_async:
+        raise ValueError(
+            f"Use a synchronous driver to import the database, not {engine.driver}"
+        )
+    try:
+        with engine.connect() as connection:
+            names = sorted(inspect(connection).get_table_names(schema=schema))
+            if patterns:
+                names = [
+                    name
+                    for name in names
+                    if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+                ]
+            for batch in batched(names, batch_size):
+                metadata = MetaData()
+                metadata.reflect(
+                    connection, schema=schema, only=batch, resolve_fks=False
+                )
+                yield from (
+                    metadata.tables[f"{schema}.{name}" if schema else name]
+                    for name in batch
+                )
+    finally:
+        engine.dispose()
+
+
+def import_database(
+    dsn: str,
+    module: str = "",
+    schema: Optional[str] = None,
+    patterns: Optional[list[str]] = None,
+    batch_size: int = 100,
+    sync: bool = False,
+):
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.exc import ArgumentError, SQLAlchemyError
+
+    project_folder = find_scaffold_project()
+    try:
+        url = resolve_dsn(dsn)
+        module = module or identifier(
+            functions.to_snake(
+                functions.clean_name(
+                    pathlib.Path(make_url(url).database or "database").stem
+                )
+            )
+        )
+        start = datetime.datetime.now()
+        renderers = [
+            TableRenderer(project_folder, module, table, sync)
+            for table in reflect_tables(url, schema, patterns, batch_size)
+        ]
+    except (ValueError, ArgumentError, SQLAlchemyError, ImportError) as err:
+        typer.echo(typer.style(str(err), fg=typer.colors.RED))
+        raise typer.Exit(1) from err
+    if not renderers:
+        typer.echo("Nenhuma tabela encontrada")
+        raise typer.Exit()
+    rendered: dict[pathlib.Path, str] = {}
+    sources: dict[pathlib.Path, list[str]] = {}
+    for renderer in renderers:
+        for path, content in renderer.render().items():
+            rendered[path] = content
+            sources.setdefault(path, []).append(renderer.table.name)
+    if conflicts := sorted(
+        {tuple(tables) for tables in sources.values() if len(tables) > 1}
+    ):
+        typer.echo(
+            typer.style(
+                "Tabelas com o mesmo nome normalizado, filtre-as com --table: {tables}".format(
+                    tables="; ".join(", ".join(tables) for tables in conflicts)
+                ),
+                fg=typer.colors.RED,
+            )
+        )
+        raise typer.Exit(1)
+    write_scaffold(project_folder, rendered, get_config().max_concurrency)
+    manifest = load_manifest(project_folder, seed=True)
+    if manifest is not None:
+        # registered at once, `register` rebuilds the whole registry per name
+        modules = manifest.modules()
+        entry = modules.setdefault(module, {kind: [] for kind in MODULE_KINDS})
+        for renderer in renderers:
+            name = renderer.entity_snake_case
+            entry["tables"].append(name)
+            entry["dtos"].extend(
+                f"{name}{suffix}" for suffix in ["", "_in", "_edit", "_embed_array"]
+            )
+        manifest.set_registry(
+            modules,
+            repositories=[
+                *manifest.names("repositories"),
+                *(item.entity_snake_case for item in renderers if item.has_id),
+            ],
+        )
+        manifest.save()
+    if skipped := [
+        renderer.table.name for renderer in renderers if not renderer.has_id
+    ]:
+        typer.echo(
+            typer.style(
+                "Sem repositório, a chave primária não é um id inteiro: {tables}".format(
+                    tables=", ".join(skipped)
+                ),
+                fg=typer.colors.YELLOW,
+            )
+        )
+    typer.echo(
+        "{tables} tabelas importadas em {module}, {files} arquivos escritos em {elapsed:.1f}s".format(
+            tables=len(renderers),
+            module=module,
+            files=len(rendered),
+            elapsed=(datetime.datetime.now() - start).total_seconds(),
+        )
+    )
@@ -1,23 +1,100 @@
+import hashlib
+import os
+import sys
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional
 
 import typer
 
+from api_project_generator.core.config import get_config
+from api_project_generator.core.manifest import (
+    ProjectManifest,
+    load_manifest,
+    scan_registry,
+    subpackages,
+)
 from api_project_generator.helpers import files, functions
+from api_project_generator.helpers.module_helper import ModuleIndex, StaticSpec
 
 
-def update_imports():
+class Package(NamedTuple):
+    dunder_file: Path
+    inheritance_finder: Callable[[str], tuple[bool, type[Any]]]
+    static_spec: StaticSpec
+
+
+class PackageReport(NamedTuple):
+    package: str
+    names: tuple[str, ...]
+    written: bool
+    elapsed: float
+
+
+def update_imports(
+    static: bool = False,
+    watch: bool = False,
+    jobs: Optional[int] = None,
+    report: bool = False,
+    rescan: bool = False,
+):
     curdir = functions.get_curdir()
     db_dir = functions.find_directory(curdir, "database")
     if not db_dir:
         typer.echo(typer.style("Diretório do projeto não foi encontrado"))
         raise typer.Exit()
     project_folder = db_dir.parent
-    functions.prepare_to_import(project_folder)
-    update_dtos(project_folder)
-    update_enums(project_folder)
-    update_tables(project_folder)
-    update_repositories(project_folder)
-    update_routes(project_folder)
+    index = None
+    if static or watch:
+        index = get_module_index(project_folder)
+    else:
+        functions.prepare_to_import(project_folder)
+    manifest = load_manifest(project_folder)
+    if rescan and manifest is not None:
+        modules, enums, repositories = scan_registry(project_folder)
+        manifest.set_registry(modules, enums=enums, repositories=repositories)
+        if manifest.save():
+            typer.echo("Registro de módulos atualizado no pyproject.toml")
+    start = time.perf_counter()
+    try:
+        reports = update_packages(
+            list_packages(project_folder, manifest), project_folder, index, jobs
+        )
+    except SyntaxError as err:
+        echo_syntax_error(err)
+        raise typer.Exit(1) from err
+    if index is not None:
+        index.save()
+    if report:
+        echo_report(reports, time.perf_counter() - start)
+    written = sum(item.written for item in reports)
+    typer.echo(f"{written} arquivos __init__.py atualizados")
+    if watch:
+        watch_imports(project_folder, index)
+
+
+def get_module_index(project_folder: Path) -> ModuleIndex:
+    """
+    Returns the static index of `project_folder`, kept in the cache directory
+    so the project tree stays untouched.
+    """
+    key = hashlib.blake2b(
+        str(project_folder.resolve()).encode(), digest_size=8
+    ).hexdigest()
+    return ModuleIndex(
+        get_config().cache_dir / "imports-index" / f"{key}.json", project_folder
+    )
+
+
+def echo_syntax_error(err: SyntaxError):
+    typer.echo(
+        typer.style(
+            f"Erro de sintaxe em {err.filename}:{err.lineno}", fg=typer.colors.RED
+        )
+    )
 
 
 def ignore_when_running(func, *args, **kwargs):
@@ -27,53 +104,227 @@ def ignore_when_running(func, *args, **kwargs):
         pass
 
 
-def update_dtos(project_folder: Path):
-    for item in (project_folder / "dtos").iterdir():
-        if item.is_dir() and item.name not in ["__pycache__", "enums"]:
-            functions.update_module_dunder_file(
-                item / files.Files.python_file("init", dunder=True),
-                project_folder,
-                inheritance_finder=functions.dto_inheritance_finder,
+def list_packages(
+    project_folder: Path, manifest: Optional[ProjectManifest] = None
+) -> list[Package]:
+    """
+    Lists every package whose `__init__.py` is generated, in update order.
+
+    The modules come from the registry of `manifest` when it has one and
+    from listing the project folders otherwise.
+    """
+    dtos_folder = project_folder / "dtos"
+    tables_folder = project_folder / "database" / "tables"
+    routes_folder = project_folder / "routes"
+    if manifest is not None and manifest.has_registry:
+        modules = manifest.modules()
+        dtos, tables, routes = (
+            [
+                name
+                for name, kinds in modules.items()
+                if kinds[kind] and (folder / name).is_dir()
+            ]
+            for kind, folder in (
+                ("dtos", dtos_folder),
+                ("tables", tables_folder),
+                ("routers", routes_folder),
             )
+        )
+    else:
+        dtos = subpackages(dtos_folder, ("enums",))
+        tables = subpackages(tables_folder)
+        routes = subpackages(routes_folder, ("dependencies",))
+    dunder = files.Files.python_file("init", dunder=True)
+    packages = [
+        Package(
+            dtos_folder / name / dunder,
+            functions.dto_inheritance_finder,
+            functions.dto_static_spec,
+        )
+        for name in dtos
+    ]
+    packages.append(
+        Package(
+            dtos_folder / "enums" / dunder,
+            functions.enum_inheritance_finder,
+            functions.enum_static_spec,
+        )
+    )
+    packages.extend(
+        Package(
+            tables_folder / name / dunder,
+            functions.table_inheritance_finder,
+            functions.table_static_spec,
+        )
+        for name in tables
+    )
+    packages.append(
+        Package(
+            project_folder / "database" / "repositories" / dunder,
+            functions.repo_inheritance_finder,
+            functions.repo_static_spec,
+        )
+    )
+    packages.extend(
+        Package(
+            routes_folder / name / dunder,
+            functions.routes_inheritance_finder,
+            functions.routes_static_spec,
+        )
+        for name in routes
+    )
+    return packages
 
 
-def update_enums(project_folder: Path):
-    functions.update_module_dunder_file(
-        project_folder
-        / "dtos"
-        / "enums"
-        / files.Files.python_file("init", dunder=True),
+def update_package(
+    package: Package, project_folder: Path, index: Optional[ModuleIndex] = None
+) -> PackageReport:
+    """
+    Regenerates the `__init__.py` of `package`, parsing its modules when
+    `index` is given and importing them otherwise.
+    """
+    start = time.perf_counter()
+    findings = functions.find_module_names(
+        package.dunder_file,
         project_folder,
-        inheritance_finder=functions.enum_inheritance_finder,
+        inheritance_finder=package.inheritance_finder,
+        static_spec=package.static_spec if index is not None else None,
+        index=index,
+    )
+    written = functions.write_dunder_file(package.dunder_file, findings)
+    return PackageReport(
+        package.dunder_file.parent.relative_to(project_folder).as_posix(),
+        tuple(findings.all_keys()),
+        written,
+        time.perf_counter() - start,
     )
 
 
-def update_repositories(project_folder: Path):
-    functions.update_module_dunder_file(
-        project_folder
-        / "database"
-        / "repositories"
-        / files.Files.python_file("init", dunder=True),
-        project_folder,
-        inheritance_finder=functions.repo_inheritance_finder,
-    )
+# below this many packages starting the workers costs more than it saves
+PARALLEL_THRESHOLD = 64
+# index of the worker process, see `update_packages`
+_worker_index: Optional[ModuleIndex] = None
+
+
+def _init_worker(path: list[str], project_folder: Path, index_path: Optional[Path]):
+    global _worker_index
+    sys.path[:] = path
+    if index_path is not None:
+        _worker_index = ModuleIndex(index_path, project_folder)
+
+
+def _update_in_worker(package: Package, project_folder: Path):
+    report = update_package(package, project_folder, _worker_index)
+    return report, _worker_index.take_seen() if _worker_index is not None else {}
+
 
+def update_packages(
+    packages: list[Package],
+    project_folder: Path,
+    index: Optional[ModuleIndex] = None,
+    jobs: Optional[int] = None,
+) -> list[PackageReport]:
+    """
+    Regenerates every package, spreading them over `jobs` processes as
+    analysing the modules is CPU bound.
 
-def update_routes(project_folder: Path):
-    for item in (project_folder / "routes").iterdir():
-        if item.is_dir() and "pycache" not in item.name and item.name != "dependencies":
-            functions.update_module_dunder_file(
-                item / files.Files.python_file("init", dunder=True),
-                project_folder,
-                inheritance_finder=functions.routes_inheritance_finder,
+    Each worker loads its own copy of the index and sends back the entries it
+    looked up, so `index` ends up as if the packages ran in this process.
+
+    :param packages: The packages to regenerate.
+    :param project_folder: The project root.
+    :param index: The static index, modules are imported when missing.
+    :param jobs: The number of processes. Defaults to the number of CPUs
+        from `PARALLEL_THRESHOLD` packages on, and to this process below it.
+    :return: The report of each package, in the order of `packages`.
+    """
+    if jobs is None:
+        jobs = (os.cpu_count() or 1) if len(packages) >= PARALLEL_THRESHOLD else 1
+    jobs = min(jobs, len(packages))
+    if jobs <= 1:
+        return [update_package(package, project_folder, index) for package in packages]
+    reports = []
+    with ProcessPoolExecutor(
+        jobs,
+        initializer=_init_worker,
+        initargs=(sys.path, project_folder, index and index.path),
+    ) as executor:
+        for report, seen in executor.map(
+            partial(_update_in_worker, project_folder=project_folder),
+            packages,
+            chunksize=max(1, len(packages) // (jobs * 4)),
+        ):
+            reports.append(report)
+            if index is not None:
+                index.merge(seen)
+    return reports
+
+
+def echo_report(reports: list[PackageReport], elapsed: float):
+    for report in sorted(reports, key=lambda item: item.elapsed, reverse=True):
+        typer.echo(
+            "{elapsed:>8.1f}ms {marker} {package} ({count}): {names}".format(
+                elapsed=report.elapsed * 1000,
+                marker="*" if report.written else " ",
+                package=report.package,
+                count=len(report.names),
+                names=textwrap.shorten(", ".join(report.names), 80) or "-",
             )
+        )
+    typer.echo(
+        "{count} pacotes em {elapsed:.1f}ms, soma {total:.1f}ms".format(
+            count=len(reports),
+            elapsed=elapsed * 1000,
+            total=sum(item.elapsed for item in reports) * 1000,
+        )
+    )
 
 
-def update_tables(project_folder: Path):
-    for item in (project_folder / "database" / "tables").iterdir():
-        if item.is_dir() and "pycache" not in item.name:
-            functions.update_module_dunder_file(
-                item / files.Files.python_file("init", dunder=True),
-                project_folder,
-                inheritance_finder=functions.table_inheritance_finder,
+def watch_imports(project_folder: Path, index: ModuleIndex):
+    """
+    Stays resident and regenerates only the packages holding the changed
+    modules, parsing them statically as imported modules would go stale.
+    """
+    from api_project_generator.core.watch import watch
+
+    roots = [
+        project_folder / "dtos",
+        project_folder / "database" / "tables",
+        project_folder / "database" / "repositories",
+        project_folder / "routes",
+    ]
+
+    def on_change(changed: set[Path]):
+        # reloaded on every change, the other commands register while watching
+        manifest = load_manifest(project_folder)
+        packages = [
+            package
+            for package in list_packages(project_folder, manifest)
+            if package.dunder_file.parent.is_dir()
+            and any(
+                path == package.dunder_file.parent
+                or package.dunder_file.parent in path.parents
+                for path in changed
             )
+        ]
+        for package in packages:
+            try:
+                report = update_package(package, project_folder, index)
+            except SyntaxError as err:
+                echo_syntax_error(err)
+                continue
+            if report.written:
+                typer.echo(
+                    "{time} {package} atualizado".format(
+                        time=time.strftime("%H:%M:%S"),
+                        package=package.dunder_file.relative_to(
+                            project_folder
+                        ).as_posix(),
+                    )
+                )
+        index.save()
+
+    typer.echo(
+        typer.style("Observando alterações, Ctrl+C para sair", fg=typer.colors.GREEN)
+    )
+    watch(roots, on_change)
@@ -1,3 +1,4 @@
+from .batch import create_apis, load_projects
 from .command import create_api
 
-__all__ = ["create_api"]
+__all__ = ["create_api", "create_apis", "load_projects"]
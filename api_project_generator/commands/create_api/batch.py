@@ -0,0 +1,176 @@
+from datetime import date
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+import tomlkit
+import typer
+from gyver.database import Driver
+from gyver.filetree import FileTree
+from gyver.utils import json
+
+from api_project_generator import models
+from api_project_generator.commands.create_api.command import (
+    emit,
+    ensure_available,
+    ensure_empty_folder,
+    make_pyproject,
+    render_api,
+)
+from api_project_generator.core import dependencies, dirs, external
+from api_project_generator.core.config import Config
+from api_project_generator.core.user_data import GitData
+from api_project_generator.models.project_organization import ProjectOrganization
+from api_project_generator.models.version import VersionType, validate_version_format
+
+PROJECT_FIELDS = {
+    "name",
+    "version",
+    "version_type",
+    "description",
+    "fullname",
+    "email",
+    "driver",
+    "organization",
+    "pyver",
+}
+
+
+def read_records(path: Path) -> list[dict[str, Any]]:
+    """
+    Reads the project records of a manifest file.
+
+    TOML files declare an array of tables named `projects`, JSON files either
+    a list or an object with a `projects` list, and JSONL files one object
+    per line.
+
+    :param path: The manifest file.
+    :return: The raw records in file order.
+    """
+    text = path.read_text()
+    suffix = path.suffix.lower()
+    if suffix == ".toml":
+        return tomlkit.parse(text).unwrap().get("projects", [])
+    if suffix == ".json":
+        data = json.loads(text)
+        return data.get("projects", []) if isinstance(data, dict) else data
+    if suffix == ".jsonl":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    raise ValueError(f"Unsupported manifest format: {path.suffix or path.name}")
+
+
+def make_project_info(
+    record: dict[str, Any],
+    config: Config,
+    git_data: GitData,
+    db_driver: Optional[Driver] = None,
+    organization: Optional[ProjectOrganization] = None,
+) -> models.ProjectInfo:
+    """
+    Builds a `ProjectInfo` from a manifest record, filling the missing
+    fields with the same defaults the interactive prompts offer.
+
+    :param record: The manifest record, only `name` is required.
+    :param config: The user config holding the defaults.
+    :param git_data: The git config used for the author defaults.
+    :param db_driver: The driver used when the record sets none.
+    :param organization: The organization used when the record sets none.
+    :return: The project info.
+    """
+    if unknown := sorted(record.keys() - PROJECT_FIELDS):
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if not record.get("name"):
+        raise ValueError("Missing field: name")
+    version_type = VersionType(record.get("version_type", config.default_version_type))
+    version = record.get("version") or (
+        "0.1.0"
+        if version_type is VersionType.SEMVER
+        else ".".join(date.today().isoformat().split("-")[:2])
+    )
+    validate_version_format(version, version_type)
+    driver = record.get("driver")
+    return models.ProjectInfo(
+        config,
+        record["name"],
+        version,
+        version_type,
+        record.get("description", ""),
+        record.get("fullname") or git_data.default_fullname(),
+        record.get("email") or git_data.default_email(),
+        Driver(driver) if driver else db_driver,
+        ProjectOrganization(
+            record.get("organization", organization or config.default_organization)
+        ),
+        record.get("pyver") or config.default_pyver,
+    )
+
+
+def load_projects(
+    path: Path,
+    config: Config,
+    db_driver: Optional[Driver] = None,
+    organization: Optional[ProjectOrganization] = None,
+) -> list[models.ProjectInfo]:
+    git_data = GitData()
+    infos = []
+    for index, record in enumerate(read_records(path), 1):
+        try:
+            infos.append(
+                make_project_info(record, config, git_data, db_driver, organization)
+            )
+        except (ValueError, typer.BadParameter) as err:
+            name = record.get("name") if isinstance(record, dict) else None
+            raise ValueError(
+                f"Invalid project #{index} ({name or 'unnamed'}): {err}"
+            ) from err
+    names = [info.name for info in infos]
+    if duplicated := sorted({name for name in names if names.count(name) > 1}):
+        raise ValueError(f"Duplicated project names: {', '.join(duplicated)}")
+    return infos
+
+
+def create_apis(
+    infos: Sequence[models.ProjectInfo],
+    offline: bool = False,
+    max_workers: int = 8,
+    dry_run: bool = False,
+    archive: Optional[Path] = None,
+):
+    """
+    Generates every project, resolving the dependencies of all of them in a
+    single batch and writing the file trees concurrently.
+
+    Nothing is written unless every project renders.
+
+    :param infos: The projects to generate.
+    :param offline: Whether to resolve dependencies only from the cache.
+    :param max_workers: The maximum number of concurrent requests and writes.
+    :param dry_run: Whether to list the files instead of writing them.
+    :param archive: A tar archive to write instead of the folders.
+    """
+    pyprojects = [make_pyproject(info, offline) for info in infos]
+    if dry_run or archive is not None:
+        folders = [dirs.get_curdir() / info.name for info in infos]
+    else:
+        folders = [ensure_empty_folder(info) for info in infos]
+    try:
+        # warms the cache, so each project below reads its versions locally
+        dependencies.get_latest_versions(
+            set().union(*(pyproject.all_dependencies() for pyproject in pyprojects)),
+            offline,
+        )
+    except external.OfflineError as err:
+        typer.echo(typer.style(str(err), fg=typer.colors.RED))
+        raise typer.Exit(1) from err
+    filetrees = []
+    for folder, pyproject in zip(folders, pyprojects):
+        ensure_available(pyproject)
+        typer.echo(
+            typer.style(
+                f"Creating project structure: {pyproject.project_info.name}",
+                fg=typer.colors.GREEN,
+            )
+        )
+        filetree = FileTree(folder)
+        render_api(folder, filetree, pyproject)
+        filetrees.append(filetree)
+    emit(filetrees, dry_run, archive, max_workers)
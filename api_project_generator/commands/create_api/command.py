@@ -1,4 +1,5 @@
-from typing import Optional
+from pathlib import Path
+from typing import Optional, Sequence
 
 import typer
 from gyver.filetree import FileTree
@@ -6,21 +7,45 @@ from gyver.filetree import FileTree
 from api_project_generator import models
 from api_project_generator.commands.create_api.modular import ModularApiGenerator
 from api_project_generator.commands.create_api.structure import StructureApiGenerator
-from api_project_generator.core import dependencies, dirs, ide
+from api_project_generator.core import dependencies, dirs, external, ide
+from api_project_generator.core.cache import get_cache
+from api_project_generator.core.config import get_config
+from api_project_generator.core.files import (
+    build_manifest,
+    write_archive,
+    write_filetrees,
+)
 from api_project_generator.models.project_organization import ProjectOrganization
 
 
-def create_api(open_ide: Optional[str], info: models.ProjectInfo):
-    pyproject = models.PyprojectToml(
+def make_pyproject(info: models.ProjectInfo, offline: bool = False):
+    # PyprojectToml adds the driver dependencies to the sets it receives
+    return models.PyprojectToml(
         info,
-        dependencies.DEFAULT_API_DEPENDENCIES,
-        dependencies.DEFAULT_DEV_DEPENDENCIES,
-        dependencies.DEFAULT_DEPLOY_DEPENDENCIES,
+        set(dependencies.DEFAULT_API_DEPENDENCIES),
+        set(dependencies.DEFAULT_DEV_DEPENDENCIES),
+        set(dependencies.DEFAULT_DEPLOY_DEPENDENCIES),
+        offline,
     )
-    typer.echo(typer.style("Creating project structure", fg=typer.colors.GREEN))
-    curdir = dirs.get_curdir()
-    folder = curdir / info.name
 
+
+def ensure_available(pyproject: models.PyprojectToml):
+    """
+    Fails before rendering when working offline and the cache lacks something,
+    online lookups overlap with rendering instead.
+    """
+    if not pyproject.offline:
+        return
+    try:
+        pyproject.versions
+        external.get_python_ignore(get_cache(), pyproject.offline)
+    except external.OfflineError as err:
+        typer.echo(typer.style(str(err), fg=typer.colors.RED))
+        raise typer.Exit(1) from err
+
+
+def ensure_empty_folder(info: models.ProjectInfo):
+    folder = dirs.get_curdir() / info.name
     if folder.exists() and (not folder.is_dir() or any(folder.iterdir())):
         typer.echo(
             typer.style(
@@ -29,13 +54,63 @@ def create_api(open_ide: Optional[str], info: models.ProjectInfo):
             )
         )
         raise typer.Exit(1)
-    filetree = FileTree(folder)
+    return folder
+
+
+def render_api(folder, filetree: FileTree, pyproject: models.PyprojectToml):
     ApiGenerator = (
         StructureApiGenerator
-        if info.organization is ProjectOrganization.STRUCTURAL
+        if pyproject.project_info.organization is ProjectOrganization.STRUCTURAL
         else ModularApiGenerator
     )
-    with filetree.context():
-        ApiGenerator(folder, filetree, pyproject).create()
-    if open_ide:
+    ApiGenerator(folder, filetree, pyproject).create()
+
+
+def emit(
+    filetrees: Sequence[FileTree],
+    dry_run: bool = False,
+    archive: Optional[Path] = None,
+    max_workers: int = 8,
+):
+    """
+    Sends the rendered trees to their destination: a listing of the planned
+    files, an archive, or the disk when neither is requested.
+
+    :param filetrees: The rendered trees.
+    :param dry_run: Whether to list the files instead of writing them.
+    :param archive: A tar archive to write instead of the folders.
+    :param max_workers: The maximum number of concurrent writes to disk.
+    """
+    if dry_run:
+        manifest = build_manifest(filetrees)
+        for path, content in manifest.items():
+            typer.echo(f"{len(content):>8}  {path}")
+        typer.echo(f"{len(manifest)} files, {sum(map(len, manifest.values()))} bytes")
+    if archive is not None:
+        try:
+            write_archive(filetrees, archive)
+        except ValueError as err:
+            typer.echo(typer.style(str(err), fg=typer.colors.RED))
+            raise typer.Exit(1) from err
+        typer.echo(f"Archive written to: {archive}")
+    if not dry_run and archive is None:
+        write_filetrees(filetrees, max_workers)
+
+
+def create_api(
+    open_ide: Optional[str],
+    info: models.ProjectInfo,
+    offline: bool = False,
+    dry_run: bool = False,
+    archive: Optional[Path] = None,
+):
+    to_disk = not dry_run and archive is None
+    pyproject = make_pyproject(info, offline)
+    ensure_available(pyproject)
+    typer.echo(typer.style("Creating project structure", fg=typer.colors.GREEN))
+    folder = ensure_empty_folder(info) if to_disk else dirs.get_curdir() / info.name
+    filetree = FileTree(folder)
+    render_api(folder, filetree, pyproject)
+    emit([filetree], dry_run, archive, get_config().max_concurrency)
+    if open_ide and to_disk:
         ide.open_ide(open_ide, folder)
@@ -1,4 +1,5 @@
 import pathlib
+from concurrent.futures import ThreadPoolExecutor
 
 import tomlkit
 from gyver.attrs import define
@@ -8,13 +9,31 @@ from gyver.utils import lazyfield, strings
 
 from api_project_generator import models
 from api_project_generator.commands.create_api import templates
-from api_project_generator.core.cache import Cache
+from api_project_generator.core.cache import get_cache
 from api_project_generator.core.external import get_python_ignore
 from api_project_generator.core.local import find_docker_executable, make_local_db
 from api_project_generator.core.manifest import append_manifest
 from api_project_generator.core.project import project_folders
+from api_project_generator.helpers import strings as helper_strings
 from api_project_generator.helpers.utils import clean_name, kebab_case
 
+# statement run on each new connection and the value it takes, from
+# DB_STATEMENT_TIMEOUT in milliseconds; SQLite has no such setting
+STATEMENT_TIMEOUTS = {
+    Driver.POSTGRES: (
+        "SET statement_timeout = {}",
+        "settings.DB_STATEMENT_TIMEOUT",
+    ),
+    Driver.MYSQL: (
+        "SET SESSION max_execution_time = {}",
+        "settings.DB_STATEMENT_TIMEOUT",
+    ),
+    Driver.MARIADB: (
+        "SET SESSION max_statement_time = {}",
+        "settings.DB_STATEMENT_TIMEOUT / 1000",
+    ),
+}
+
 
 @define
 class ApiGeneratorDefaults:
@@ -22,9 +41,9 @@ class ApiGeneratorDefaults:
     files: FileTree
     pyproject_toml: models.PyprojectToml
 
-    @lazyfield
+    @property
     def cache(self):
-        return Cache(self.project_info.config.default_cache_dir)
+        return get_cache()
 
     @property
     def project_info(self):
@@ -59,6 +78,10 @@ class ApiGeneratorDefaults:
     def pyproject_table(self):
         return self.pyproject_toml.make_table(self.project_folder.name)
 
+    @lazyfield
+    def python_ignore(self):
+        return get_python_ignore(self.cache, self.pyproject_toml.offline)
+
     def create_pyproject_toml(self):
         file = self.files.create_text_file("pyproject.toml")
         append_manifest(self.pyproject_table, self.project_info)
@@ -80,6 +103,14 @@ class ApiGeneratorDefaults:
                     version=self.project_info.version,
                 )
             )
+            tests_folder.create_py_file("test_providers").write(
+                helper_strings.TEST_HTTP_PROVIDER.format(
+                    project_folder=self.project_folder.name,
+                    core_folder=project_folders.core_folder,
+                    exceptions_folder=project_folders.exceptions_folder,
+                    providers_folder=project_folders.providers_folder,
+                )
+            )
 
     def create_core_folder(self):
         with self.project_folder.virtual_context(
@@ -107,14 +138,54 @@ class ApiGeneratorDefaults:
                 templates.EXCEPTIONS_FILE
             )
 
+    def create_providers_folder(self):
+        with self.project_folder.virtual_context(
+            project_folders.providers_folder
+        ) as providers_folder:
+            providers_folder.dunder_init().write(
+                templates.DUNDER_PROVIDERS.render(
+                    db=self.project_info.driver is not None
+                )
+            )
+            providers_folder.create_py_file("http").write(
+                helper_strings.HTTP_PROVIDER.format(
+                    project_folder=self.project_folder.name
+                )
+            )
+            if self.project_info.driver is None:
+                return
+            timeout_statement, timeout_value = STATEMENT_TIMEOUTS.get(
+                self.project_info.driver, (None, None)
+            )
+            providers_folder.create_py_file("database").write(
+                templates.DATABASE_PROVIDER_FILE.render(
+                    project_folder=self.project_folder.name,
+                    core_folder=project_folders.core_folder,
+                    timeout_statement=timeout_statement,
+                    timeout_value=timeout_value,
+                )
+            )
+
     def create_api_folder(self):
         with self.project_folder.virtual_context(
             project_folders.api_folder
         ) as api_folder:
             api_folder.dunder_init()
+            api_folder.create_py_file("http").write(
+                templates.HTTP_API_FILE.render(
+                    project_folder=self.project_folder.name,
+                    providers_folder=project_folders.providers_folder,
+                )
+            )
             if self.project_info.driver is None:
                 return
             api_folder.create_py_file("database").write(templates.DATABASE_API_FILE)
+            api_folder.create_py_file("pagination").write(
+                templates.PAGINATION_API_FILE.render(
+                    project_folder=self.project_folder.name,
+                    exceptions_folder=project_folders.exceptions_folder,
+                )
+            )
 
     def create_main_file(self):
         self.project_folder.create_py_file(project_folders.main_file).write(
@@ -123,14 +194,14 @@ class ApiGeneratorDefaults:
                 project_as_title=self.pyproject_toml.get_project_title(),
                 core_folder=project_folders.core_folder,
                 exceptions_folder=project_folders.exceptions_folder,
+                providers_folder=project_folders.providers_folder,
                 db=self.project_info.driver is not None,
             )
         )
 
     def create_ignores(self):
-        python_ignore = get_python_ignore(self.cache)
-        self.files.create_text_file(".gitignore").write(python_ignore)
-        self.files.create_text_file(".dockerignore").write(python_ignore)
+        self.files.create_text_file(".gitignore").write(self.python_ignore)
+        self.files.create_text_file(".dockerignore").write(self.python_ignore)
 
     def create_dockerfile(self):
         self.files.create_text_file("Dockerfile").write(
@@ -214,16 +285,28 @@ class ApiGeneratorDefaults:
         )
 
     def create_defaults(self):
+        # lookups that may reach the network run while the local templates
+        # render, they only touch the cache and never the file tree. The cache
+        # is opened first so the threads do not both initialize it
+        self.cache
+        with ThreadPoolExecutor(2) as executor:
+            remote = [
+                executor.submit(lambda: self.pyproject_toml.versions),
+                executor.submit(lambda: self.python_ignore),
+            ]
+            self.setup_project_folder()
+            self.create_test_folder()
+            self.create_core_folder()
+            self.create_exceptions_folder()
+            self.create_providers_folder()
+            self.create_api_folder()
+            self.create_main_file()
+            self.create_dockerfile()
+            self.create_rcs()
+            self.create_dotenvs()
+            self.create_makefile()
+            self.create_alembic_folder()
+            for future in remote:
+                future.result()
         self.create_pyproject_toml()
-        self.setup_project_folder()
-        self.create_test_folder()
-        self.create_core_folder()
-        self.create_exceptions_folder()
-        self.create_api_folder()
-        self.create_main_file()
         self.create_ignores()
-        self.create_dockerfile()
-        self.create_rcs()
-        self.create_dotenvs()
-        self.create_makefile()
-        self.create_alembic_folder()
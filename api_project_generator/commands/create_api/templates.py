@@ -1,17 +1,78 @@
-from jinja2 import Template
+import shutil
+import threading
+from typing import TYPE_CHECKING
 
+from gyver.attrs import define
+from gyver.utils import cache
+
+from api_project_generator import __version__
+from api_project_generator.core.config import get_config
 from api_project_generator.helpers.utils import lead_spaces_as_tabs
 
-BASE_TEST_FILE = Template(
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+_sources: dict[str, str] = {}
+_environment_lock = threading.Lock()
+
+
+def get_environment() -> "Environment":
+    """
+    Returns the environment holding every template of this module.
+
+    Compiled templates are stored in the cache directory under the package
+    version, so later runs skip lexing and compiling. Creation is serialized,
+    concurrent first calls would otherwise both clear and fill that directory.
+    """
+    with _environment_lock:
+        return _create_environment()
+
+
+@cache
+def _create_environment() -> "Environment":
+    from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+
+    templates_dir = get_config().cache_dir / "templates"
+    bytecode_dir = templates_dir / __version__
+    if templates_dir.exists():
+        for stale in templates_dir.iterdir():
+            if stale != bytecode_dir:
+                shutil.rmtree(stale, ignore_errors=True)
+    bytecode_dir.mkdir(parents=True, exist_ok=True)
+    return Environment(
+        loader=DictLoader(_sources),
+        bytecode_cache=FileSystemBytecodeCache(str(bytecode_dir)),
+    )
+
+
+@define
+class LazyTemplate:
+    """
+    Named handle to a template of `get_environment`, loaded on the first render.
+    """
+
+    name: str
+    source: str
+
+    def __post_init__(self):
+        _sources[self.name] = self.source
+
+    def render(self, *args, **kwargs) -> str:
+        return get_environment().get_template(self.name).render(*args, **kwargs)
+
+
+BASE_TEST_FILE = LazyTemplate(
+    "base_test_file",
     """from {{project_folder}} import __version__
 
 def test_{{project_folder}}():
     assert __version__ == "{{version}}"
 
-"""
+""",
 )
 
-SETTINGS_FILE = Template(
+SETTINGS_FILE = LazyTemplate(
+    "settings_file",
     """
 from pathlib import Path
 
@@ -20,7 +81,8 @@ from gyver.config import (
     EnvConfig, 
     Env, 
     DotFile, 
-    AdapterConfigFactory
+    AdapterConfigFactory,
+    boolean_cast,
 )
 {% if db %}
 from gyver.database import DatabaseConfig, Driver
@@ -32,9 +94,41 @@ logger = set_logger(config.env)
 factory = AdapterConfigFactory(config)
 
 {% if db %}
-db_config_factory = factory.maker(DatabaseConfig, __prefix__="db", db_driver=Driver.{{driver.name}})
+# Each worker process holds its own pools, so an instance opens up to
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections, twice that once the
+# sync sessions are used. Keep it times the instances, counting the ones
+# started during a rollout, below the max_connections of the server.
+db_config_factory = factory.maker(
+    DatabaseConfig,
+    __prefix__="db",
+    db_driver=Driver.{{driver.name}},
+    db_pool_size=5,
+    db_max_overflow=5,
+    db_pool_recycle=1800,
+)
+DB_POOL_PRE_PING = config("DB_POOL_PRE_PING", boolean_cast, "true")
+# in milliseconds, 0 disables it
+DB_STATEMENT_TIMEOUT = config("DB_STATEMENT_TIMEOUT", int, 0)
 {% endif %}
-"""
+
+HTTP_LIMIT = config("HTTP_LIMIT", int, 100)
+HTTP_LIMIT_PER_HOST = config("HTTP_LIMIT_PER_HOST", int, 20)
+HTTP_KEEPALIVE_TIMEOUT = config("HTTP_KEEPALIVE_TIMEOUT", float, 15)
+HTTP_DNS_CACHE_TTL = config("HTTP_DNS_CACHE_TTL", int, 300)
+HTTP_TIMEOUT = config("HTTP_TIMEOUT", float, 30)
+HTTP_CONNECT_TIMEOUT = config("HTTP_CONNECT_TIMEOUT", float, 5)
+HTTP_READ_TIMEOUT = config("HTTP_READ_TIMEOUT", float, 10)
+HTTP_CONCURRENCY = config("HTTP_CONCURRENCY", int, 10)
+HTTP_RETRIES = config("HTTP_RETRIES", int, 0)
+HTTP_RETRY_BACKOFF = config("HTTP_RETRY_BACKOFF", float, 0.1)
+HTTP_RETRY_BACKOFF_MAX = config("HTTP_RETRY_BACKOFF_MAX", float, 2)
+HTTP_HEDGE_DELAY = config("HTTP_HEDGE_DELAY", float, 0)
+HTTP_BREAKER_THRESHOLD = config("HTTP_BREAKER_THRESHOLD", int, 5)
+HTTP_BREAKER_RESET = config("HTTP_BREAKER_RESET", float, 30)
+HTTP_CACHE_MAX_ENTRIES = config("HTTP_CACHE_MAX_ENTRIES", int, 1024)
+HTTP_CACHE_MAX_BYTES = config("HTTP_CACHE_MAX_BYTES", int, 64 * 1024 * 1024)
+HTTP_CACHE_TTL = config("HTTP_CACHE_TTL", float, 0)
+""",
 )
 
 LOG_FILE = """import logging
@@ -49,12 +143,13 @@ def set_logger(env: Env):
 
 """
 
-DUNDER_ROUTES = Template(
+DUNDER_ROUTES = LazyTemplate(
+    "dunder_routes",
     """from .{{main_router_file}} import router
 
 
 __all__ = ["router"] 
-"""
+""",
 )
 
 MAIN_ROUTER_FILE = """from fastapi import APIRouter
@@ -87,7 +182,152 @@ SyncContext = Annotated[SessionContext, Depends(get_sync_context)]
 
 """
 
-BASE_SCHEMA_FILE = """from typing import Generic, TypeVar
+HTTP_API_FILE = LazyTemplate(
+    "http_api_file",
+    """from fastapi import Request, Depends
+from typing_extensions import Annotated
+
+from {{project_folder}}.{{providers_folder}} import HttpProvider
+
+def get_http_provider(request: Request) -> HttpProvider:
+    return request.app.state.http_provider
+
+Http = Annotated[HttpProvider, Depends(get_http_provider)]
+
+""",
+)
+
+DUNDER_PROVIDERS = LazyTemplate(
+    "dunder_providers",
+    """from .http import HttpProvider
+{%- if db %}
+from .database import create_database_provider, dispose_database_provider
+{%- endif %}
+
+__all__ = [
+    "HttpProvider",
+{%- if db %}
+    "create_database_provider",
+    "dispose_database_provider",
+{%- endif %}
+]
+
+""",
+)
+
+DATABASE_PROVIDER_FILE = LazyTemplate(
+    "database_provider_file",
+    """from gyver.database import DatabaseAdapter
+from lazyfields import is_initialized
+{%- if timeout_statement %}
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+{%- endif %}
+
+from {{project_folder}}.{{core_folder}} import settings
+{% if timeout_statement %}
+
+@event.listens_for(Engine, "connect")
+def set_statement_timeout(dbapi_connection, connection_record):
+    # every new connection of both engines, 0 keeps the server default
+    if not settings.DB_STATEMENT_TIMEOUT:
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("{{timeout_statement}}".format({{timeout_value}}))
+    cursor.close()
+{% endif %}
+
+def create_database_provider() -> DatabaseAdapter:
+    # pool_size, max_overflow and pool_recycle come from the config
+    return DatabaseAdapter(
+        settings.db_config_factory(), {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    )
+
+
+async def dispose_database_provider(provider: DatabaseAdapter):
+    # only the engines in use, reading the others would create them
+    if is_initialized(provider, "async_engine"):
+        await provider.async_engine.dispose()
+    if is_initialized(provider, "engine"):
+        provider.engine.dispose()
+
+""",
+)
+
+PAGINATION_API_FILE = LazyTemplate(
+    "pagination_api_file",
+    """import base64
+import decimal
+import json
+from typing import Any, Optional
+
+from sqlalchemy import Column, Table
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
+
+from {{project_folder}}.{{exceptions_folder}} import default_error
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(value: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def cursor_types(column: Column) -> tuple[type, ...]:
+    # what a cursor of `column` may decode to, anything else is not a key
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return (str, int, float)
+    if issubclass(python_type, bool):
+        return (bool,)
+    if issubclass(python_type, int):
+        return (int,)
+    if issubclass(python_type, (float, decimal.Decimal)):
+        return (int, float)
+    return (str,)
+
+
+def decode_cursor(cursor: str, column: Optional[Column] = None) -> Any:
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as err:
+        raise default_error("Invalid cursor", field="cursor") from err
+    types = cursor_types(column) if column is not None else (str, int, float)
+    if not isinstance(value, types) or (
+        isinstance(value, bool) and bool not in types
+    ):
+        raise default_error("Invalid cursor", field="cursor")
+    return value
+
+
+def page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def paginate(
+    table: Table, query: Select, cursor: Optional[str], limit: int, key: str = "id"
+) -> Select:
+    # keyset pagination, rows after the cursor in key order plus one to
+    # know whether another page exists, never a whole table
+    column = table.c[key]
+    if cursor is not None:
+        query = query.where(column > decode_cursor(cursor, column))
+    return query.order_by(column).limit(page_size(limit) + 1)
+
+
+def page(rows: list[Row], limit: int, key: str = "id") -> dict:
+    limit = page_size(limit)
+    data = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = encode_cursor(data[-1][key]) if len(rows) > limit else None
+    return {"data": data, "next_cursor": next_cursor}
+
+""",
+)
+
+BASE_SCHEMA_FILE = """from typing import Generic, Optional, TypeVar
 
 from pydantic.generics import GenericModel
 from gyver.model import Model
@@ -96,16 +336,21 @@ T = TypeVar("T")
 
 class EmbedListSchema(GenericModel, Generic[T], Model):
     data: list[T]
+
+
+class CursorPageSchema(GenericModel, Generic[T], Model):
+    data: list[T]
+    next_cursor: Optional[str] = None
 """
 
 EXCEPTION_HANDLERS_FILE = """from fastapi import Request, FastAPI
 from fastapi.responses import JSONResponse
 
-from .exceptions import ApiError, exception_handler
+from .exceptions import APIError, exception_handler
 
 
 def set_api_error_handler(app: FastAPI):
-    app.add_exception_handler(ApiError, exception_handler)
+    app.add_exception_handler(APIError, exception_handler)
 
 """
 
@@ -140,7 +385,7 @@ class APIError(Exception):
         Exception.__init__(self, self.message, self.key, self.status, self.field)
 
 
-error_response_status = (404, 409, 400, 401, 403, 422)
+error_response_status = (404, 409, 400, 401, 403, 422, 503)
 
 as_status = HTTPStatus
 
@@ -227,6 +472,15 @@ def unexpected_error(reason: str):
     return APIError("Unexpected Error", "005", as_status(500), field=reason)
 
 
+class UpstreamUnavailable(APIError):
+    """
+    Raised while the circuit breaker of an upstream host is open.
+    """
+
+    def __init__(self, host: str = "Upstream") -> None:
+        super().__init__(f"{host} is unavailable", "006", as_status(503), host)
+
+
 def default_error(
     message: str,
     key: str = "000",
@@ -345,6 +599,7 @@ from .exceptions import (
     invalid_or_expired_token,
     field_error,
     unexpected_error,
+    UpstreamUnavailable,
     default_error,
     not_found_if_none,
 )
@@ -359,32 +614,46 @@ __all__ = [
     "invalid_or_expired_token",
     "field_error",
     "unexpected_error",
+    "UpstreamUnavailable",
     "default_error",
     "not_found_if_none",
 ]
 
 """
 
-MAIN_FILE = Template(
+MAIN_FILE = LazyTemplate(
+    "main_file",
     """from fastapi import FastAPI
-{% if db %}    
-from gyver.database import DatabaseAdapter
-{% endif %}
+
 from {{project_folder}} import routes
 from {{project_folder}}.{{core_folder}} import settings
 from {{project_folder}}.{{exceptions_folder}} import set_api_error_handler
+from {{project_folder}}.{{providers_folder}} import HttpProvider
+{%- if db %}
+from {{project_folder}}.{{providers_folder}} import (
+    create_database_provider,
+    dispose_database_provider,
+)
+{%- endif %}
 
 def create_startup_handler(app: FastAPI):
-    def _startup():
-        {% if db %}app.state.database_provider = DatabaseAdapter(settings.db_config_factory())
-        {% else %}# add handlers to be executed on initialization
-        pass
+    async def _startup():
+        app.state.http_provider = HttpProvider()
+        {% if db %}app.state.database_provider = create_database_provider()
         {% endif %}
 
-
     return _startup
 
 
+def create_shutdown_handler(app: FastAPI):
+    async def _shutdown():
+        await app.state.http_provider.finish()
+        {% if db %}await dispose_database_provider(app.state.database_provider)
+        {% endif %}
+
+    return _shutdown
+
+
 
 def get_application(prefix: str = ""):
     app = FastAPI(
@@ -396,6 +665,7 @@ def get_application(prefix: str = ""):
     app.include_router(routes.router, prefix=prefix)
 
     app.add_event_handler("startup", create_startup_handler(app))
+    app.add_event_handler("shutdown", create_shutdown_handler(app))
     set_api_error_handler(app)
 
     return app
@@ -404,16 +674,17 @@ def get_application(prefix: str = ""):
 app = get_application()
 
 
-if __name__ = "__main__":
+if __name__ == "__main__":
     import uvicorn
 
     uvicorn.run("{{project_folder}}.main:app", reload=True)
 
-"""
+""",
 )
 
 
-DOCKERFILE = Template(
+DOCKERFILE = LazyTemplate(
+    "dockerfile",
     """FROM python:{{pyver}}-slim as dependencies
 
 # Installing default dependencies
@@ -449,11 +720,12 @@ ENTRYPOINT alembic upgrade head && \
 # Expose app port
 EXPOSE 8000
 
-"""
+""",
 )
 
 
-COVERAGE_RC = Template(
+COVERAGE_RC = LazyTemplate(
+    "coverage_rc",
     """# .coveragerc to control coverage.py
 [run]
 source = {{project_folder}}
@@ -481,7 +753,7 @@ exclude_lines =
     pass
 ignore_errors = True
 
-"""
+""",
 )
 
 
@@ -513,7 +785,8 @@ def downgrade():
     ${downgrades if downgrades else "pass"}
 '''
 
-ALEMBIC_ENV = Template(
+ALEMBIC_ENV = LazyTemplate(
+    "alembic_env",
     '''# type: ignore
 from pathlib import Path
 from logging.config import fileConfig
@@ -599,10 +872,11 @@ if context.is_offline_mode():
     run_migrations_offline()
 else:
     run_migrations_online()
-'''
+''',
 )
 
-ALEMBIC_INI = Template(
+ALEMBIC_INI = LazyTemplate(
+    "alembic_ini",
     """# A generic, single database configuration.
 
 [alembic]
@@ -692,32 +966,36 @@ formatter = generic
 [formatter_generic]
 format = %(levelname)-5.5s [%(name)s] %(message)s
 datefmt = %H:%M:%S
-"""
+""",
 )
 
-DOTENV_TEMPLATE = Template(
+DOTENV_TEMPLATE = LazyTemplate(
+    "dotenv_template",
     """DB_NAME={{db.name}}
 DB_USER={{db.user}}
 DB_PASSWORD={{db.password}}
 DB_HOST={{db.host}}
-"""
+""",
 )
 
-POSTGRES_DOTENV = Template(
+POSTGRES_DOTENV = LazyTemplate(
+    "postgres_dotenv",
     """POSTGRES_USER={{db.user}}
 POSTGRES_PASSWORD={{db.password}}
 POSTGRES_DB={{db.name}}
-"""
+""",
 )
-MYSQL_COMPAT_DOTENV = Template(
+MYSQL_COMPAT_DOTENV = LazyTemplate(
+    "mysql_compat_dotenv",
     """{{db_varname}}_USER={{db.user}}
 {{db_varname}}_PASSWORD={{db.password}}
 {{db_varname}}_ROOT_PASSWORD={{db.password}}
 {{db_varname}}_DATABASE={{db.name}}
-"""
+""",
 )
 
-MAKEFILE_TEMPLATE = Template(
+MAKEFILE_TEMPLATE = LazyTemplate(
+    "makefile_template",
     lead_spaces_as_tabs(
         """.PHONY: format run-dev test lint setup-localdb teardown-localdb
 
@@ -753,7 +1031,7 @@ teardown-localdb:
 {% endif %}
 {% endif %}
 """
-    )
+    ),
 )
 
 
@@ -1,8 +1,9 @@
 import contextlib
 import os
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, List, Mapping, Optional
 
 import sqlalchemy as sa
 from appdirs import user_cache_dir
@@ -16,9 +17,45 @@ from gyver.database import (
     default_metadata,
     make_table,
 )
-from gyver.utils import lazyfield, timezone
+from gyver.utils import cache, lazyfield, timezone
+
+from api_project_generator.core.config import get_config
 
 DEFAULT_TTL = timedelta(hours=5)
+Validators = tuple[Optional[str], Optional[str]]
+SWEEP_INTERVAL = DEFAULT_TTL
+# expired rows keep their validators for revalidation, they are only swept
+# once they are unlikely to be asked for again
+SWEEP_RETENTION = timedelta(days=30)
+SWEEP_MARKER = ".last-sweep"
+
+
+def _set_sqlite_pragmas(dbapi_connection, _):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+@define
+class CacheEntry:
+    key: str
+    content: str
+    fresh: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@define
+class PackageRecord:
+    name: str
+    version: str
+    yanked: bool = False
+    requires_python: Optional[str] = None
+    releases: tuple[str, ...] = ()
+    fresh: bool = True
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
 
 
 @define
@@ -27,8 +64,14 @@ class Cache:
     database_config: Optional[DatabaseConfig] = None
 
     def __post_init__(self):
+        # built before any thread can race to create it
+        self.lock
         self.initialize()
 
+    @lazyfield
+    def lock(self):
+        return threading.RLock()
+
     @lazyfield
     def cache_dir(self):
         cache_dir = self._cache_dir
@@ -43,6 +86,8 @@ class Cache:
             Driver.SQLITE, f'/{(self.cache_dir / "cache.db").as_posix()}'
         )
         adapter = DatabaseAdapter(config)
+        if config.driver is Driver.SQLITE:
+            sa.event.listen(adapter.engine, "connect", _set_sqlite_pragmas)
         with adapter.engine.connect():
             pass
         return adapter.context()
@@ -56,18 +101,87 @@ class Cache:
             sa.Column("key", sa.Text, primary_key=True),
             sa.Column("content", sa.Text),
             sa.Column("expiration", sa.DateTime),
+            sa.Column("etag", sa.Text, nullable=True),
+            sa.Column("last_modified", sa.Text, nullable=True),
+            sa.Column("pinned", sa.Boolean, default=False),
         )
 
+    @lazyfield
+    def packages_table(self):
+        if (table := default_metadata.tables.get("packages")) is not None:
+            return table
+        return make_table(
+            "packages",
+            sa.Column("name", sa.Text, primary_key=True),
+            sa.Column("version", sa.Text),
+            sa.Column("yanked", sa.Boolean, default=False),
+            sa.Column("requires_python", sa.Text, nullable=True),
+            sa.Column("releases", sa.Text),
+            sa.Column("expiration", sa.DateTime, index=True),
+            sa.Column("etag", sa.Text, nullable=True),
+            sa.Column("last_modified", sa.Text, nullable=True),
+            sa.Column("pinned", sa.Boolean, default=False),
+        )
+
+    @contextlib.contextmanager
+    def connect(self, transaction: bool = False):
+        """
+        Opens the shared connection, one thread at a time.
+
+        :param transaction: Whether to commit on success and roll back on error.
+        """
+        context = atomic(self.context) if transaction else self.context
+        with self.lock, context as conn:
+            yield conn
+
+    @staticmethod
+    def _pinned(conn, column: sa.Column, keys: list[str]) -> set[str]:
+        # replacing a pinned row keeps it pinned
+        result = conn.execute(
+            sa.select(column).where(column.in_(keys), column.table.c.pinned.is_(True))
+        )
+        return set(result.scalars())
+
     def initialize(self):
-        with self.context as conn:
-            self.table.create(conn, checkfirst=True)
-            with atomic(self.context) as conn:
+        with self.connect() as conn:
+            for table in (self.table, self.packages_table):
+                if sa.inspect(conn).has_table(table.name):
+                    columns = {
+                        column["name"]
+                        for column in sa.inspect(conn).get_columns(table.name)
+                    }
+                    if columns != set(table.c.keys()):
+                        # cache written by an older version, safe to discard
+                        table.drop(conn)
+                table.create(conn, checkfirst=True)
+            conn.commit()
+        self.sweep()
+
+    def sweep(self, force: bool = False) -> None:
+        """
+        Deletes the rows expired for longer than `SWEEP_RETENTION`, at most
+        once every `SWEEP_INTERVAL` unless `force` is set. Pinned rows, the
+        ones imported from a snapshot, are kept for offline use.
+
+        :param force: Whether to ignore the last sweep time.
+        """
+        marker = self.cache_dir / SWEEP_MARKER
+        with contextlib.suppress(FileNotFoundError):
+            last_sweep = datetime.fromtimestamp(marker.stat().st_mtime)
+            if not force and datetime.now() - last_sweep < SWEEP_INTERVAL:
+                return
+        threshold = timezone.now() - SWEEP_RETENTION
+        with self.connect(transaction=True) as conn:
+            for table in (self.table, self.packages_table):
                 conn.execute(
-                    self.table.delete().where(self.table.c.expiration < timezone.now())
+                    table.delete().where(
+                        table.c.expiration < threshold, table.c.pinned.is_not(True)
+                    )
                 )
+        marker.touch()
 
     def get(self, key: str):
-        with self.context as conn:
+        with self.connect() as conn:
             result = conn.execute(
                 self.table.select().where(
                     self.table.c.key == key,
@@ -78,17 +192,174 @@ class Cache:
                 return val["content"]
             raise CacheMiss(key)
 
-    def set(self, key: str, content: str, ttl: Optional[datetime] = None) -> None:
-        with atomic(self.context) as conn:
+    def _entries_query(self, *where: sa.ColumnElement[bool]):
+        return sa.select(
+            self.table.c.key,
+            self.table.c.content,
+            (self.table.c.expiration >= timezone.now()).label("fresh"),
+            self.table.c.etag,
+            self.table.c.last_modified,
+        ).where(*where)
+
+    def get_entry(self, key: str) -> CacheEntry:
+        """
+        Returns the entry for `key` even if it is expired, so its validators
+        can be used to revalidate it.
+        """
+        with self.connect() as conn:
+            result = conn.execute(self._entries_query(self.table.c.key == key))
+            if val := result.mappings().first():
+                return CacheEntry(**val)
+            raise CacheMiss(key)
+
+    def set(
+        self,
+        key: str,
+        content: str,
+        ttl: Optional[datetime] = None,
+        *,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        pinned: bool = False,
+    ) -> None:
+        with self.connect(transaction=True) as conn:
+            pinned = pinned or bool(self._pinned(conn, self.table.c.key, [key]))
             conn.execute(self.table.delete().where(self.table.c.key == key))
             conn.execute(
                 self.table.insert().values(
                     key=key,
                     content=content,
                     expiration=ttl or (timezone.now() + DEFAULT_TTL),
+                    etag=etag,
+                    last_modified=last_modified,
+                    pinned=pinned,
                 )
             )
 
+    def refresh(self, keys: Iterable[str], ttl: Optional[datetime] = None) -> None:
+        """
+        Extends the expiration of `keys`, used when the origin answers
+        `304 Not Modified`.
+        """
+        keys = list(keys)
+        if not keys:
+            return
+        with self.connect(transaction=True) as conn:
+            conn.execute(
+                self.table.update()
+                .where(self.table.c.key.in_(keys))
+                .values(expiration=ttl or (timezone.now() + DEFAULT_TTL))
+            )
+
+    def get_packages(self, names: Iterable[str]) -> dict[str, PackageRecord]:
+        """
+        Returns the stored records for `names`, expired ones included.
+        """
+        names = list(names)
+        if not names:
+            return {}
+        table = self.packages_table
+        with self.connect() as conn:
+            result = conn.execute(
+                sa.select(
+                    table.c.name,
+                    table.c.version,
+                    table.c.yanked,
+                    table.c.requires_python,
+                    table.c.releases,
+                    (table.c.expiration >= timezone.now()).label("fresh"),
+                    table.c.etag,
+                    table.c.last_modified,
+                ).where(table.c.name.in_(names))
+            )
+            records = {}
+            for row in result.mappings():
+                releases = tuple(filter(None, row["releases"].split("\n")))
+                records[row["name"]] = PackageRecord(**dict(row, releases=releases))
+            return records
+
+    def set_packages(
+        self,
+        records: Iterable[PackageRecord],
+        ttl: Optional[datetime] = None,
+        pinned: bool = False,
+    ) -> None:
+        """
+        Stores `records`, replacing the ones with the same names.
+
+        :param pinned: Whether `sweep` must keep the records once expired.
+        """
+        records = list(records)
+        if not records:
+            return
+        table = self.packages_table
+        expiration = ttl or (timezone.now() + DEFAULT_TTL)
+        names = [record.name for record in records]
+        with self.connect(transaction=True) as conn:
+            kept = self._pinned(conn, table.c.name, names)
+            conn.execute(table.delete().where(table.c.name.in_(names)))
+            conn.execute(
+                table.insert(),
+                [
+                    {
+                        "name": record.name,
+                        "version": record.version,
+                        "yanked": record.yanked,
+                        "requires_python": record.requires_python,
+                        "releases": "\n".join(record.releases),
+                        "expiration": expiration,
+                        "etag": record.etag,
+                        "last_modified": record.last_modified,
+                        "pinned": pinned or record.name in kept,
+                    }
+                    for record in records
+                ],
+            )
+
+    def refresh_packages(
+        self, names: Iterable[str], ttl: Optional[datetime] = None
+    ) -> None:
+        names = list(names)
+        if not names:
+            return
+        table = self.packages_table
+        with self.connect(transaction=True) as conn:
+            conn.execute(
+                table.update()
+                .where(table.c.name.in_(names))
+                .values(expiration=ttl or (timezone.now() + DEFAULT_TTL))
+            )
+
+    def set_many(
+        self,
+        mapping: Mapping[str, str],
+        ttl: Optional[datetime] = None,
+        *,
+        validators: Optional[Mapping[str, Validators]] = None,
+        pinned: bool = False,
+    ) -> None:
+        if not mapping:
+            return
+        expiration = ttl or (timezone.now() + DEFAULT_TTL)
+        validators = validators or {}
+        with self.connect(transaction=True) as conn:
+            kept = self._pinned(conn, self.table.c.key, list(mapping))
+            conn.execute(self.table.delete().where(self.table.c.key.in_(list(mapping))))
+            conn.execute(
+                self.table.insert(),
+                [
+                    {
+                        "key": key,
+                        "content": content,
+                        "expiration": expiration,
+                        "etag": validators.get(key, (None, None))[0],
+                        "last_modified": validators.get(key, (None, None))[1],
+                        "pinned": pinned or key in kept,
+                    }
+                    for key, content in mapping.items()
+                ],
+            )
+
     def set_file(self, filename: str, content: bytes):
         file_path = self.cache_dir / filename
         with open(file_path, "wb") as file:
@@ -103,7 +374,7 @@ class Cache:
             raise CacheMiss from err
 
     def delete(self, key: str) -> None:
-        with atomic(self.context) as conn:
+        with self.connect(transaction=True) as conn:
             conn.execute(self.table.delete().where(self.table.c.key == key))
 
     def delete_file(self, filename: str) -> None:
@@ -112,7 +383,7 @@ class Cache:
             os.remove(file_path)
 
     def cleankeys(self, keys: List[str]) -> None:
-        with atomic(self.context) as conn:
+        with self.connect(transaction=True) as conn:
             conn.execute(self.table.delete().where(self.table.c.key.in_(keys)))
 
     def cleanfiles(self, filenames: List[str]) -> None:
@@ -124,9 +395,11 @@ class Cache:
     def destroy(self) -> None:
         self.cleankeys(self.get_all_keys())
         self.cleanfiles(self.get_all_files())
+        with self.connect(transaction=True) as conn:
+            conn.execute(self.packages_table.delete())
 
     def get_all_keys(self) -> List[str]:
-        with self.context as conn:
+        with self.connect() as conn:
             result = conn.execute(self.table.select())
             return [row["key"] for row in result.mappings()]
 
@@ -141,3 +414,22 @@ class Cache:
 
 class CacheMiss(Exception):
     pass
+
+
+_cache_lock = threading.Lock()
+
+
+@cache
+def _create_cache() -> Cache:
+    return Cache(get_config().default_cache_dir)
+
+
+def get_cache() -> Cache:
+    """
+    Returns the process-wide cache, created on first use.
+
+    `cache` alone lets concurrent first calls each build a `Cache`, racing
+    to create its tables, so the construction is serialized.
+    """
+    with _cache_lock:
+        return _create_cache()
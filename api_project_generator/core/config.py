@@ -20,38 +20,47 @@ class Config:
     default_pyver: str
     default_organization: ProjectOrganization
     default_version_type: VersionType
+    max_concurrency: int = 8
 
     @lazyfield
     def cache_dir(self):
         return Path(self.default_cache_dir)
 
 
+# created when the config is first written, importing this module stays free
+# of filesystem access
 cache_dir = Path(user_cache_dir("api-project-generator"))
-cache_dir.mkdir(exist_ok=True)
 config_cache = cache_dir / "api-project.toml"
 
 
+def default_config() -> Config:
+    return Config(
+        pypi_url="https://pypi.org/simple",
+        gitignore_url="https://raw.githubusercontent.com/github/gitignore/master/Python.gitignore",
+        default_ide="",
+        default_cache_dir=str(cache_dir),
+        default_docker_executable="",
+        default_pyver=f"{sys.version_info.major}.{sys.version_info.minor}",
+        default_organization=ProjectOrganization.STRUCTURAL,
+        default_version_type=VersionType.SEMVER,
+    )
+
+
 @cache
 def get_config() -> Config:
-    config_cache = cache_dir / "api-project.toml"
     if not config_cache.exists():
-        config = Config(
-            pypi_url="https://pypi.org/simple",
-            gitignore_url="https://raw.githubusercontent.com/github/gitignore/master/Python.gitignore",
-            default_ide="",
-            default_cache_dir=str(cache_dir),
-            default_docker_executable="",
-            default_pyver=f"{sys.version_info.major}.{sys.version_info.minor}",
-            default_organization=ProjectOrganization.STRUCTURAL,
-            default_version_type=VersionType.SEMVER,
-        )
+        config = default_config()
         set_config(config)
     else:
         with open(config_cache) as stream:
-            config = fromdict(Config, tomlkit.load(stream))
+            # fill fields added after the config file was written
+            config = fromdict(
+                Config, asdict(default_config()) | dict(tomlkit.load(stream))
+            )
     return config
 
 
 def set_config(config: Config):
+    config_cache.parent.mkdir(parents=True, exist_ok=True)
     with open(config_cache, "w") as stream:
         tomlkit.dump(asdict(config), stream)
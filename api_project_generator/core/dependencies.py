@@ -1,13 +1,15 @@
 import re
+from typing import Iterable, Mapping, Optional
 
-from api_project_generator.core.cache import Cache
+from api_project_generator.core.cache import get_cache
 from api_project_generator.core.config import get_config
 
-from .external import get_package_info
+from .external import get_package_info, get_packages_info
 
 DEFAULT_API_DEPENDENCIES = {
     "fastapi",
     "uvicorn",
+    "aiohttp",
 }
 DEFAULT_DEV_DEPENDENCIES = {
     "pytest",
@@ -27,6 +29,18 @@ DEFAULT_DEPLOY_DEPENDENCIES = {
     "circus",
 }
 
+# added by PyprojectToml depending on the database driver
+DRIVER_DEPENDENCIES = {"gyver", "sqlalchemy"}
+
+
+def all_default_dependencies() -> set[str]:
+    return (
+        DEFAULT_API_DEPENDENCIES
+        | DEFAULT_DEV_DEPENDENCIES
+        | DEFAULT_DEPLOY_DEPENDENCIES
+        | DRIVER_DEPENDENCIES
+    )
+
 
 def get_dependency_table(lib: str, version: str, *extras: str):
     version = f"^{version}"
@@ -55,15 +69,29 @@ def dependency_and_extras(lib: str):
     return lib, []
 
 
-def get_latest_version(lib: str):
-    return get_package_info(lib, Cache(get_config().default_cache_dir))["info"][
-        "version"
-    ]
+def get_latest_version(lib: str, offline: bool = False):
+    return get_package_info(lib, get_cache(), offline).version
+
+
+def get_latest_versions(libs: Iterable[str], offline: bool = False) -> dict[str, str]:
+    config = get_config()
+    infos = get_packages_info(
+        {dependency_and_extras(lib)[0] for lib in libs},
+        get_cache(),
+        config.max_concurrency,
+        offline,
+    )
+    return {lib: record.version for lib, record in infos.items()}
 
 
-def get_dependency(lib: str, optional: bool = False):
+def get_dependency(
+    lib: str,
+    optional: bool = False,
+    versions: Optional[Mapping[str, str]] = None,
+    offline: bool = False,
+):
     dep, extras = dependency_and_extras(lib)
-    latest_version = get_latest_version(dep)
+    latest_version = (versions or {}).get(dep) or get_latest_version(dep, offline)
     if optional:
         return get_optional_dependency_table(dep, latest_version, *extras)
     return get_dependency_table(dep, latest_version, *extras)
@@ -0,0 +1,148 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+from gyver.attrs import define
+
+from api_project_generator.core.config import get_config
+
+SITE_PACKAGES_SCRIPT = (
+    "import json, sysconfig; "
+    "print(json.dumps([sysconfig.get_path('purelib'), sysconfig.get_path('platlib')]))"
+)
+
+
+@define
+class Environment:
+    path: Path
+    site_packages: tuple[Path, ...]
+
+
+def env_python(env: Path) -> Path:
+    if sys.platform == "win32":
+        return env / "Scripts" / "python.exe"
+    return env / "bin" / "python"
+
+
+def is_virtualenv(path: Path) -> bool:
+    return (path / "pyvenv.cfg").is_file()
+
+
+def mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def explicit_environment(project_root: Path) -> Optional[Path]:
+    """
+    Returns the active virtualenv or the in-project `.venv`, the ones used
+    without asking poetry.
+    """
+    candidates = [project_root / ".venv"]
+    if active := os.environ.get("VIRTUAL_ENV"):
+        candidates.insert(0, Path(active))
+    return next((path for path in candidates if is_virtualenv(path)), None)
+
+
+def poetry_environment(project_root: Path) -> Optional[Path]:
+    try:
+        result = subprocess.run(
+            ["poetry", "env", "info", "--path"],
+            cwd=project_root,
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return None
+    path = result.stdout.strip()
+    if result.returncode != 0 or not path:
+        return None
+    return Path(path)
+
+
+def query_site_packages(env: Path) -> tuple[Path, ...]:
+    """
+    Asks the interpreter of `env` where its packages live, so the paths
+    follow its actual version and layout.
+    """
+    try:
+        result = subprocess.run(
+            [str(env_python(env)), "-c", SITE_PACKAGES_SCRIPT],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ()
+    return tuple(Path(path) for path in dict.fromkeys(json.loads(result.stdout)))
+
+
+class EnvironmentCache:
+    """
+    The environments discovered so far by project root, each keyed by the
+    mtimes of `poetry.lock` and of the `pyvenv.cfg` of the environment.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            with open(path) as stream:
+                self._records: dict[str, Any] = json.load(stream)
+        except (FileNotFoundError, ValueError):
+            self._records = {}
+
+    @staticmethod
+    def make_key(project_root: Path, env: Path):
+        return [mtime_ns(project_root / "poetry.lock"), mtime_ns(env / "pyvenv.cfg")]
+
+    def get(
+        self, project_root: Path, env: Optional[Path] = None
+    ) -> Optional[Environment]:
+        record = self._records.get(str(project_root))
+        if record is None or (env is not None and record["env"] != str(env)):
+            return None
+        env = Path(record["env"])
+        if record["key"] != self.make_key(project_root, env):
+            return None
+        return Environment(env, tuple(Path(path) for path in record["site_packages"]))
+
+    def set(self, project_root: Path, environment: Environment):
+        self._records[str(project_root)] = {
+            "env": str(environment.path),
+            "key": self.make_key(project_root, environment.path),
+            "site_packages": [str(path) for path in environment.site_packages],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w") as stream:
+            json.dump(self._records, stream)
+        os.replace(temp_path, self.path)
+
+
+def find_environment(project_root: Path) -> Optional[Environment]:
+    """
+    Finds the virtualenv of the project and its site-packages folders.
+
+    `VIRTUAL_ENV` and the in-project `.venv` come first, `poetry env info`
+    is only asked otherwise. The result is cached until `poetry.lock` or the
+    environment changes, so most calls start no subprocess.
+
+    :param project_root: The folder holding `pyproject.toml`.
+    :return: The environment, if one was found.
+    """
+    project_root = project_root.resolve()
+    cache = EnvironmentCache(get_config().cache_dir / "environments.json")
+    explicit = explicit_environment(project_root)
+    if (environment := cache.get(project_root, explicit)) is not None:
+        return environment
+    env = explicit or poetry_environment(project_root)
+    if env is None or not (site_packages := query_site_packages(env)):
+        return None
+    environment = Environment(env, site_packages)
+    cache.set(project_root, environment)
+    return environment
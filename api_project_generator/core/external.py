@@ -1,40 +1,199 @@
 import urllib.request as _request
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Iterable, Mapping, Optional
+from urllib.error import HTTPError
 
+from gyver.attrs import define
 from gyver.utils import json
 
-from api_project_generator.core.cache import Cache, CacheMiss
+from api_project_generator.core.cache import Cache, CacheMiss, PackageRecord
+
+JSON_HEADERS = {
+    "Content-Type": "application/json; charset=utf-8",
+    "Accept": "application/vnd.pypi.simple.v1+json",
+}
+
+
+class OfflineError(CacheMiss):
+    def __init__(self, *names: str) -> None:
+        super().__init__(*names)
+        self.names = names
+
+    def __str__(self) -> str:
+        return (
+            "Not available offline: {names}. Import a snapshot containing them "
+            "with 'api-project cache:import'".format(names=", ".join(self.names))
+        )
+
+
+@define
+class Response:
+    status: int
+    content: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == HTTPStatus.NOT_MODIFIED
+
+
+def request(
+    url: str,
+    headers: Optional[Mapping[str, str]] = None,
+    *,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> Response:
+    """
+    Makes a GET request, sending the validators of a cached response so the
+    origin can answer `304 Not Modified` instead of the full payload.
+
+    :param url: The url to request.
+    :param headers: Extra headers to send.
+    :param etag: The ETag of the cached response, if any.
+    :param last_modified: The Last-Modified of the cached response, if any.
+    :return: The response status, content and validators.
+    """
+    headers = dict(headers or {})
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        response = _request.urlopen(_request.Request(url, headers=headers, method="GET"))
+    except HTTPError as err:
+        if err.code != HTTPStatus.NOT_MODIFIED:
+            raise
+        return Response(err.code, b"")
+    with response:
+        return Response(
+            response.status,
+            response.read(),
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
 
 
 def get(url: str):
-    headers = {
-        "Content-Type": "application/json; charset=utf-8",
-        "Accept": "application/vnd.pypi.simple.v1+json",
-    }
-    response = _request.urlopen(_request.Request(url, headers=headers, method="GET"))
-    return json.loads(response.read().decode())
+    return json.loads(request(url, JSON_HEADERS).content.decode())
 
 
 uri_template = "https://pypi.org/pypi/{package}/json"
+gitignore_url = (
+    "https://raw.githubusercontent.com/github/gitignore/master/Python.gitignore"
+)
 
 
-def get_package_info(package: str, cache: Cache):
-    try:
-        return json.loads(cache.get(package))
-    except CacheMiss:
-        response = get(uri_template.format(package=package))
-        cache.set(package, json.dumps(response))
-        return response
+def fetch_package_info(package: str, stored: Optional[PackageRecord] = None):
+    return request(
+        uri_template.format(package=package),
+        JSON_HEADERS,
+        etag=stored and stored.etag,
+        last_modified=stored and stored.last_modified,
+    )
+
+
+def parse_package_info(package: str, response: Response) -> PackageRecord:
+    """
+    Keeps only the fields used from the PyPI JSON document.
+    """
+    data = json.loads(response.content.decode())
+    info = data["info"]
+    return PackageRecord(
+        package,
+        info["version"],
+        bool(info.get("yanked")),
+        info.get("requires_python") or None,
+        tuple(data.get("releases") or ()),
+        etag=response.etag,
+        last_modified=response.last_modified,
+    )
+
+
+def get_package_info(
+    package: str, cache: Cache, offline: bool = False
+) -> PackageRecord:
+    return get_packages_info([package], cache, max_workers=1, offline=offline)[
+        package
+    ]
 
 
-def get_python_ignore(cache: Cache):
-    filename = "Python.gitignore"
+def get_packages_info(
+    packages: Iterable[str],
+    cache: Cache,
+    max_workers: int = 8,
+    offline: bool = False,
+) -> dict[str, PackageRecord]:
+    """
+    Retrieves the PyPI record of every package, reading all stored records in a
+    single query and revalidating the expired or missing ones concurrently.
+
+    :param packages: The names of the packages to retrieve.
+    :param cache: The cache used to store the records.
+    :param max_workers: The maximum number of concurrent requests.
+    :param offline: Whether to use the stored records regardless of expiration
+        and never reach the network.
+    :return: A mapping of package name to its record.
+    """
+    packages = set(packages)
+    stored = cache.get_packages(packages)
+    if offline:
+        if missing := sorted(packages - stored.keys()):
+            raise OfflineError(*missing)
+        return stored
+    records = {package: record for package, record in stored.items() if record.fresh}
+    if missing := sorted(packages - records.keys()):
+        with ThreadPoolExecutor(max(1, min(max_workers, len(missing)))) as executor:
+            responses = dict(
+                zip(
+                    missing,
+                    executor.map(
+                        fetch_package_info,
+                        missing,
+                        [stored.get(package) for package in missing],
+                    ),
+                )
+            )
+        not_modified = [
+            package for package, response in responses.items() if response.not_modified
+        ]
+        fetched = [
+            parse_package_info(package, response)
+            for package, response in responses.items()
+            if not response.not_modified
+        ]
+        cache.refresh_packages(not_modified)
+        cache.set_packages(fetched)
+        records |= {package: stored[package] for package in not_modified}
+        records |= {record.name: record for record in fetched}
+    return records
+
+
+PYTHON_IGNORE_KEY = "Python.gitignore"
+
+
+def get_python_ignore(cache: Cache, offline: bool = False):
+    key = PYTHON_IGNORE_KEY
     try:
-        return cache.get_file(filename).decode()
+        entry = cache.get_entry(key)
     except CacheMiss:
-        url = (
-            "https://raw.githubusercontent.com/github/gitignore/master/Python.gitignore"
-        )
-        response = _request.urlopen(_request.Request(url, method="GET"))
-        contents = response.read()
-        cache.set_file(filename, contents)
-        return contents.decode()
+        entry = None
+    if entry is not None and (entry.fresh or offline):
+        return entry.content
+    if offline:
+        raise OfflineError(key)
+    response = request(
+        gitignore_url,
+        etag=entry and entry.etag,
+        last_modified=entry and entry.last_modified,
+    )
+    if entry is not None and response.not_modified:
+        cache.refresh([key])
+        return entry.content
+    contents = response.content.decode()
+    cache.set(
+        key, contents, etag=response.etag, last_modified=response.last_modified
+    )
+    return contents
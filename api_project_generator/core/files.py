@@ -0,0 +1,179 @@
+import io
+import os
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence, Union
+
+from gyver.filetree import File, FileTree, Folder
+
+# suffix: tarfile mode, `.tar.zst` is handled apart as it needs `zstandard`
+ARCHIVE_MODES = {
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tar.xz": "w:xz",
+}
+ZSTD_SUFFIX = ".tar.zst"
+
+
+def walk_folder(
+    path: Path, folder: Folder
+) -> Iterator[tuple[Path, Union[Folder, File]]]:
+    """
+    Yields every folder and file under `folder`, parents before children, in
+    the same order `FileTree.write` visits them.
+
+    :param path: The path `folder` maps to.
+    :param folder: The in-memory folder to walk.
+    """
+    for value in folder.contents.values():
+        inner_path = path / value.name
+        if isinstance(value, File):
+            yield inner_path, value
+        elif isinstance(value, Folder):
+            yield inner_path, value
+            yield from walk_folder(inner_path, value)
+
+
+def _write_file(path: Path, content: bytes):
+    with open(path, "wb") as stream:
+        stream.write(content)
+
+
+def write_files(files: Sequence[tuple[Path, bytes]], max_workers: int = 8) -> None:
+    """
+    Writes every file concurrently, their folders must exist.
+
+    :param files: The paths and contents to write.
+    :param max_workers: The maximum number of concurrent writes.
+    """
+    if not files:
+        return
+    with ThreadPoolExecutor(max(1, min(max_workers, len(files)))) as executor:
+        list(executor.map(lambda item: _write_file(*item), files))
+
+
+def _fsync(path: Path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_paths(paths: Sequence[Path], max_workers: int = 8) -> None:
+    """
+    Flushes every path to disk concurrently. Directories flush their
+    entries, which Windows cannot do, so they are skipped there.
+
+    :param paths: The files and directories to flush.
+    :param max_workers: The maximum number of concurrent flushes.
+    """
+    if os.name == "nt":
+        paths = [path for path in paths if not path.is_dir()]
+    if not paths:
+        return
+    with ThreadPoolExecutor(max(1, min(max_workers, len(paths)))) as executor:
+        list(executor.map(_fsync, paths))
+
+
+def write_filetrees(filetrees: Iterable[FileTree], max_workers: int = 8) -> None:
+    """
+    Writes the in-memory trees to disk, creating every folder first and then
+    writing all files concurrently.
+
+    Files are fsynced in a single pass once all of them were written, instead
+    of one by one, and the folders after them so the new entries persist too.
+
+    :param filetrees: The trees to write.
+    :param max_workers: The maximum number of concurrent writes.
+    """
+    files: list[tuple[Path, bytes]] = []
+    folders: list[Path] = []
+    for filetree in filetrees:
+        filetree.base_dir.mkdir(exist_ok=True)
+        # the folder holding the project gains its entry as well
+        folders.extend([filetree.base_dir.parent, filetree.base_dir])
+        for path, value in walk_folder(filetree.base_dir, filetree.root):
+            if isinstance(value, Folder):
+                path.mkdir(exist_ok=True)
+                folders.append(path)
+            else:
+                files.append((path, value.contents.getvalue()))
+    write_files(files, max_workers)
+    sync_paths([path for path, _ in files], max_workers)
+    sync_paths(list(dict.fromkeys(folders)), max_workers)
+
+
+def build_manifest(filetrees: Iterable[FileTree]) -> dict[str, bytes]:
+    """
+    Maps the path of every file, relative to the folder holding the
+    projects, to its contents without touching the disk.
+
+    :param filetrees: The rendered trees.
+    :return: A mapping of posix path to file contents.
+    """
+    manifest = {}
+    for filetree in filetrees:
+        base = filetree.base_dir.parent
+        for path, value in walk_folder(filetree.base_dir, filetree.root):
+            if isinstance(value, File):
+                manifest[path.relative_to(base).as_posix()] = value.contents.getvalue()
+    return manifest
+
+
+def add_to_tar(tar: tarfile.TarFile, filetrees: Iterable[FileTree]) -> None:
+    mtime = int(time.time())
+    for filetree in filetrees:
+        base = filetree.base_dir.parent
+        entries = [(filetree.base_dir, filetree.root)]
+        entries.extend(walk_folder(filetree.base_dir, filetree.root))
+        for path, value in entries:
+            info = tarfile.TarInfo(path.relative_to(base).as_posix())
+            info.mtime = mtime
+            if isinstance(value, Folder):
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o755
+                tar.addfile(info)
+            else:
+                content = value.contents.getvalue()
+                info.size = len(content)
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(content))
+
+
+def write_archive(filetrees: Iterable[FileTree], path: Path) -> None:
+    """
+    Writes the rendered trees to a tar archive, compressed according to the
+    suffix of `path`.
+
+    :param filetrees: The rendered trees.
+    :param path: The archive to write, see `ARCHIVE_MODES` and `ZSTD_SUFFIX`.
+    :raises ValueError: If the suffix is not supported.
+    """
+    name = path.name.lower()
+    if name.endswith(ZSTD_SUFFIX):
+        try:
+            import zstandard
+        except ImportError as err:
+            raise ValueError(
+                f"Writing {ZSTD_SUFFIX} archives requires the 'zstd' extra, install "
+                "it with: pip install 'api-project-generator[zstd]'"
+            ) from err
+        with open(path, "wb") as file, zstandard.ZstdCompressor().stream_writer(
+            file
+        ) as stream, tarfile.open(fileobj=stream, mode="w|") as tar:
+            add_to_tar(tar, filetrees)
+        return
+    mode = next(
+        (mode for suffix, mode in ARCHIVE_MODES.items() if name.endswith(suffix)),
+        None,
+    )
+    if mode is None:
+        supported = ", ".join([*ARCHIVE_MODES, ZSTD_SUFFIX])
+        raise ValueError(f"Unsupported archive format, use one of: {supported}")
+    with tarfile.open(path, mode) as tar:
+        add_to_tar(tar, filetrees)
@@ -0,0 +1,140 @@
+import os
+from collections import deque
+from pathlib import Path
+from typing import Any, Optional
+
+from gyver.attrs import define
+from gyver.utils import cache, strings
+
+from api_project_generator.helpers.utils import clean_name
+
+# where each folder the in-project commands look for lives in the package
+KNOWN_DIRS = {
+    "database": "database",
+    "dtos": "dtos",
+    "enums": "dtos/enums",
+    "tables": "database/tables",
+    "repositories": "database/repositories",
+    "routes": "routes",
+}
+SKIPPED_DIRS = {
+    "__pycache__",
+    "node_modules",
+    "venv",
+    "env",
+    "site-packages",
+    "build",
+    "dist",
+    "htmlcov",
+}
+MAX_DEPTH = 6
+
+
+def find_pyproject(start: Path) -> Optional[Path]:
+    """
+    Returns the nearest `pyproject.toml` in `start` or its parents.
+    """
+    for folder in (start, *start.parents):
+        candidate = folder / "pyproject.toml"
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def loads_toml(text: str) -> dict[str, Any]:
+    try:
+        import tomllib
+    except ImportError:
+        import tomlkit
+
+        return tomlkit.parse(text).unwrap()
+    return tomllib.loads(text)
+
+
+def load_toml(path: Path) -> dict[str, Any]:
+    return loads_toml(path.read_text())
+
+
+@define
+class ProjectLayout:
+    root: Path
+    packages: tuple[Path, ...]
+
+    def directory(self, dir_name: str) -> Optional[Path]:
+        """
+        Returns the known folder `dir_name` of the first package holding it.
+        """
+        relative = KNOWN_DIRS.get(dir_name)
+        if relative is None:
+            return None
+        for package in self.packages:
+            if (candidate := package / relative).is_dir():
+                return candidate
+        return None
+
+
+@cache
+def get_layout(pyproject: Path) -> ProjectLayout:
+    """
+    Resolves the package folders declared by `pyproject`, reading the
+    `[tool.api_project]` manifest and falling back to the poetry name of
+    projects created before it existed.
+    """
+    tool = load_toml(pyproject).get("tool", {})
+    packages = []
+    if name := tool.get("api_project", {}).get("name"):
+        packages.append(strings.to_snake(clean_name(name)))
+    if name := tool.get("poetry", {}).get("name"):
+        # the legacy create:api lowercases the name instead
+        packages.append(clean_name(name).lower())
+    root = pyproject.parent
+    return ProjectLayout(root, tuple(root / name for name in dict.fromkeys(packages)))
+
+
+def walk_for(start: Path, dir_name: str, max_depth: int = MAX_DEPTH) -> Optional[Path]:
+    """
+    Breadth first search for a folder named `dir_name` under `start`,
+    skipping hidden folders, virtualenvs and build outputs.
+
+    :param start: The folder to search, included in the search.
+    :param dir_name: The folder name to look for.
+    :param max_depth: How many levels below `start` are searched.
+    :return: The shallowest match, if any.
+    """
+    if start.name == dir_name:
+        return start
+    pending = deque([(str(start), 0)])
+    while pending:
+        path, depth = pending.popleft()
+        try:
+            entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if (
+                entry.name.startswith(".")
+                or entry.name in SKIPPED_DIRS
+                or not entry.is_dir(follow_symlinks=False)
+            ):
+                continue
+            if entry.name == dir_name:
+                return Path(entry.path)
+            if depth + 1 < max_depth:
+                pending.append((entry.path, depth + 1))
+    return None
+
+
+def locate_directory(start: Path, dir_name: str) -> Optional[Path]:
+    """
+    Finds the project folder `dir_name` from `start`, from the layout
+    declared by the nearest `pyproject.toml` when possible and by a bounded
+    walk under `start` otherwise.
+
+    :param start: The folder the command runs from.
+    :param dir_name: The folder name to look for, see `KNOWN_DIRS`.
+    :return: The folder, if found.
+    """
+    if (pyproject := find_pyproject(start)) is not None:
+        if (found := get_layout(pyproject).directory(dir_name)) is not None:
+            return found
+    return walk_for(start, dir_name)
@@ -1,9 +1,19 @@
-from typing import Any
+import json
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
 
-from api_project_generator.models.project_info import ProjectInfo
+import tomlkit
+from gyver.attrs import define
+from gyver.utils import lazyfield
 
+from api_project_generator.core.locator import find_pyproject, loads_toml
 
-def append_manifest(mapping: dict[str, Any], project_info: ProjectInfo) -> None:
+if TYPE_CHECKING:
+    from api_project_generator.models.project_info import ProjectInfo
+
+
+def append_manifest(mapping: dict[str, Any], project_info: "ProjectInfo") -> None:
     """
     Appends fields from the given `ProjectInfo` object to the TOML mapping.
 
@@ -28,3 +38,258 @@ def append_manifest(mapping: dict[str, Any], project_info: ProjectInfo) -> None:
         "pyver": project_info.effective_pyver,
         "modules": [],
     }
+    # TOML has no null, a project without database omits the key
+    if project_info.driver is None:
+        del mapping["tool"]["api_project"]["driver"]
+
+
+# registered per module, see `ProjectManifest`
+MODULE_KINDS = ("entities", "dtos", "tables", "routers")
+# registered for the whole project, these folders are not split by module
+PROJECT_KINDS = ("enums", "repositories")
+SECTION = "tool.api_project"
+BARE_KEY = re.compile(r"^[A-Za-z0-9_-]+$")
+HEADER = re.compile(r"^\s*\[\[?\s*(?P<key>[^\]]+?)\s*\]\]?\s*(#.*)?$")
+
+
+def render_value(value: Any) -> str:
+    # tomlkit escapes strings char by char, too slow for large registries
+    if isinstance(value, str) and value.isprintable():
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        items = [render_value(item) for item in value]
+        if len(items) > 4:
+            # one name per line, so registrations show up as single line diffs
+            return "[\n" + "".join(f"    {item},\n" for item in items) + "]"
+        return "[" + ", ".join(items) + "]"
+    return tomlkit.item(value).as_string()
+
+
+def render_key(key: str) -> str:
+    return key if BARE_KEY.match(key) else json.dumps(key, ensure_ascii=False)
+
+
+def render_section(table: dict[str, Any]) -> str:
+    """
+    Renders `table` as the `[tool.api_project]` section, with the registered
+    modules as an array of tables after the other keys.
+    """
+    lines = [f"[{SECTION}]"]
+    lines.extend(
+        f"{render_key(key)} = {render_value(value)}"
+        for key, value in table.items()
+        if key != "modules"
+    )
+    if not (modules := table.get("modules")):
+        lines.append("modules = []")
+    for module in modules or ():
+        lines.extend(("", f"[[{SECTION}.modules]]"))
+        lines.extend(
+            f"{render_key(key)} = {render_value(value)}"
+            for key, value in module.items()
+        )
+    return "\n".join(lines) + "\n"
+
+
+def splice_section(source: str, section: str) -> str:
+    """
+    Replaces the lines of the `[tool.api_project]` section and its subtables
+    in `source` by `section`, appending it when missing.
+    """
+    lines = source.splitlines(keepends=True)
+    start = end = None
+    for number, line in enumerate(lines):
+        if (match := HEADER.match(line)) is None:
+            continue
+        key = re.sub(r"\s", "", match["key"])
+        inside = key == SECTION or key.startswith(f"{SECTION}.")
+        if inside and start is None:
+            start = number
+        elif not inside and start is not None:
+            end = number
+            break
+    if start is None:
+        return source.rstrip("\n") + "\n\n" + section
+    if end is None:
+        return "".join(lines[:start]) + section
+    return "".join(lines[:start]) + section + "\n" + "".join(lines[end:])
+
+
+def subpackages(folder: Path, excluded: tuple[str, ...] = ()) -> list[str]:
+    if not folder.is_dir():
+        return []
+    return sorted(
+        item.name
+        for item in folder.iterdir()
+        if item.is_dir() and "pycache" not in item.name and item.name not in excluded
+    )
+
+
+def module_names(folder: Path) -> list[str]:
+    """
+    Lists the modules of `folder` the way the manifest registers them.
+    """
+    if not folder.is_dir():
+        return []
+    return sorted(
+        item.stem.removeprefix("_")
+        for item in folder.glob("*.py")
+        if item.name != "__init__.py"
+    )
+
+
+def scan_registry(project_folder: Path):
+    """
+    Rebuilds the manifest registry from the project folders, an entity is
+    a name with a dto, a table and a router in the same module.
+
+    :return: The registered modules, enums and repositories.
+    """
+    modules: dict[str, dict[str, list[str]]] = {}
+    for kind, folder, excluded in (
+        ("dtos", project_folder / "dtos", ("enums",)),
+        ("tables", project_folder / "database" / "tables", ()),
+        ("routers", project_folder / "routes", ("dependencies",)),
+    ):
+        for name in subpackages(folder, excluded):
+            modules.setdefault(name, {})[kind] = module_names(folder / name)
+    for kinds in modules.values():
+        kinds["entities"] = sorted(
+            set(kinds.get("dtos", ()))
+            & set(kinds.get("tables", ()))
+            & set(kinds.get("routers", ()))
+        )
+    return (
+        modules,
+        module_names(project_folder / "dtos" / "enums"),
+        module_names(project_folder / "database" / "repositories"),
+    )
+
+
+@define
+class ProjectManifest:
+    """
+    The `[tool.api_project]` table of a project, holding the registry of
+    what the in-project commands created so nothing has to be rediscovered.
+
+    Names are the module file names without the leading underscore, so
+    `register("dtos", "item_in", "item")` stands for `dtos/item/_item_in.py`.
+    Projects without the table, like the ones from the legacy `create:api`,
+    get one named after their package on the first registration.
+    """
+
+    pyproject: Path
+    package: str
+
+    @lazyfield
+    def source(self) -> str:
+        return self.pyproject.read_text()
+
+    @lazyfield
+    def data(self) -> dict[str, Any]:
+        return loads_toml(self.source)
+
+    @lazyfield
+    def table(self) -> dict[str, Any]:
+        table = self.data.get("tool", {}).get("api_project")
+        return dict(table) if table else {"name": self.package, "modules": []}
+
+    @property
+    def has_registry(self) -> bool:
+        return bool(self.table.get("modules")) or any(
+            self.table.get(kind) for kind in PROJECT_KINDS
+        )
+
+    def modules(self) -> dict[str, dict[str, list[str]]]:
+        return {
+            item["name"]: {kind: list(item.get(kind, [])) for kind in MODULE_KINDS}
+            for item in self.table.get("modules", [])
+        }
+
+    def names(self, kind: str) -> list[str]:
+        return list(self.table.get(kind, []))
+
+    def register(self, kind: str, name: str, module: Optional[str] = None):
+        """
+        Records `name` under `kind`, `module` is required for `MODULE_KINDS`.
+        """
+        if kind in PROJECT_KINDS:
+            self.set_registry(self.modules(), **{kind: [*self.names(kind), name]})
+            return
+        if kind not in MODULE_KINDS or module is None:
+            raise ValueError(f"Cannot register {kind} {name} in module {module}")
+        modules = self.modules()
+        entry = modules.setdefault(module, {kind: [] for kind in MODULE_KINDS})
+        entry[kind].append(name)
+        self.set_registry(modules)
+
+    def set_registry(
+        self, modules: dict[str, dict[str, list[str]]], **project: list[str]
+    ):
+        """
+        Replaces the registered modules and the given `PROJECT_KINDS`, sorting
+        and deduplicating every list so the file only changes with the registry.
+        """
+        for kind in PROJECT_KINDS:
+            if kind in project:
+                self.table[kind] = sorted(set(project[kind]))
+        registered = []
+        for name in sorted(modules):
+            item = {"name": name}
+            for kind in MODULE_KINDS:
+                if values := sorted(set(modules[name].get(kind, ()))):
+                    item[kind] = values
+            registered.append(item)
+        self.table["modules"] = registered
+
+    def save(self) -> bool:
+        """
+        Writes the section back when the registry changed.
+
+        Only the lines of the section are rewritten, which keeps saving cheap
+        on large registries as parsing them with `tomlkit` is slow. Files the
+        splice cannot handle, like ones declaring the section as dotted keys,
+        go through a full `tomlkit` round trip instead.
+
+        :return: Whether the file was written.
+        """
+        if self.table == self.data.get("tool", {}).get("api_project"):
+            return False
+        expected = dict(self.data)
+        expected["tool"] = {**expected.get("tool", {}), "api_project": self.table}
+        section = render_section(self.table)
+        contents = splice_section(self.source, section)
+        try:
+            spliced = loads_toml(contents) == expected
+        except ValueError:
+            spliced = False
+        if not spliced:
+            document = tomlkit.parse(self.source)
+            tool = document.setdefault("tool", tomlkit.table(is_super_table=True))
+            # replacing in place keeps the dotted keys of the old table
+            tool.pop("api_project", None)
+            tool["api_project"] = self.table
+            contents = tomlkit.dumps(document)
+        self.pyproject.write_text(contents)
+        return True
+
+
+def load_manifest(
+    project_folder: Path, seed: bool = False
+) -> Optional[ProjectManifest]:
+    """
+    Returns the manifest of the project whose package is `project_folder`,
+    if it has a `pyproject.toml`.
+
+    :param seed: Whether to fill an empty registry from the project folders,
+        set before registering so the first registration does not hide the
+        packages created before the registry existed.
+    """
+    pyproject = find_pyproject(project_folder)
+    if pyproject is None:
+        return None
+    manifest = ProjectManifest(pyproject, project_folder.name)
+    if seed and not manifest.has_registry:
+        modules, enums, repositories = scan_registry(project_folder)
+        manifest.set_registry(modules, enums=enums, repositories=repositories)
+    return manifest
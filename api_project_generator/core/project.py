@@ -16,6 +16,7 @@ class ProjectFolders:
     database_name: str
     alembic_folder: str
     commons: str
+    providers_folder: str
 
 
 project_folders = ProjectFolders(
@@ -32,4 +33,5 @@ project_folders = ProjectFolders(
     "database",
     "migrations",
     "common",
+    "providers",
 )
@@ -0,0 +1,72 @@
+import gzip
+from pathlib import Path
+from typing import Iterable
+
+from gyver.utils import json
+
+from api_project_generator.core.cache import Cache, PackageRecord
+from api_project_generator.core.external import (
+    PYTHON_IGNORE_KEY,
+    get_packages_info,
+    get_python_ignore,
+)
+
+SNAPSHOT_VERSION = 1
+
+
+def export_snapshot(
+    path: Path, cache: Cache, packages: Iterable[str], max_workers: int = 8
+) -> int:
+    """
+    Resolves `packages` and the gitignore and writes them to a gzipped JSON
+    snapshot that can be imported on machines without network access.
+
+    :param path: Where to write the snapshot.
+    :param cache: The cache used to resolve the packages.
+    :param packages: The names of the packages to include.
+    :param max_workers: The maximum number of concurrent requests.
+    :return: The number of packages written.
+    """
+    records = get_packages_info(packages, cache, max_workers)
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "packages": [
+            [
+                record.name,
+                record.version,
+                record.yanked,
+                record.requires_python,
+                list(record.releases),
+            ]
+            for record in sorted(records.values(), key=lambda record: record.name)
+        ],
+        "entries": {PYTHON_IGNORE_KEY: get_python_ignore(cache)},
+    }
+    # mtime is fixed so the same contents always produce the same file
+    with open(path, "wb") as file, gzip.GzipFile(
+        fileobj=file, mode="wb", mtime=0
+    ) as stream:
+        stream.write(json.dumps(snapshot).encode())
+    return len(records)
+
+
+def import_snapshot(path: Path, cache: Cache) -> int:
+    """
+    Loads a snapshot written by `export_snapshot` into the cache.
+
+    :param path: The snapshot file.
+    :param cache: The cache to load the snapshot into.
+    :return: The number of packages imported.
+    """
+    with gzip.open(path, "rb") as stream:
+        snapshot = json.loads(stream.read().decode())
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {snapshot.get('version')}")
+    records = [
+        PackageRecord(name, version, yanked, requires_python, tuple(releases))
+        for name, version, yanked, requires_python, releases in snapshot["packages"]
+    ]
+    # pinned so the sweep keeps them for as long as the machine stays offline
+    cache.set_packages(records, pinned=True)
+    cache.set_many(snapshot["entries"], pinned=True)
+    return len(records)
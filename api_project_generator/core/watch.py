@@ -0,0 +1,137 @@
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+SKIPPED_DIRS = {"__pycache__", ".mypy_cache", ".pytest_cache"}
+
+
+def is_relevant(path: Path) -> bool:
+    """
+    Whether a change to `path` can alter the generated `__init__.py` files:
+    python modules other than `__init__.py` itself and the folders holding
+    them, so renamed or removed packages are noticed.
+    """
+    if any(part in SKIPPED_DIRS for part in path.parts):
+        return False
+    if path.suffix == ".py":
+        return path.name != "__init__.py"
+    return not path.suffix
+
+
+def scan(roots: Iterable[Path]) -> dict[str, tuple[int, int]]:
+    """
+    Maps every python module under `roots` to its mtime and size.
+    """
+    found = {}
+    pending = [str(root) for root in roots if root.is_dir()]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if entry.name not in SKIPPED_DIRS:
+                        pending.append(entry.path)
+                elif entry.name.endswith(".py"):
+                    stat = entry.stat()
+                    found[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+class PollingObserver:
+    """
+    Stands in for the watchdog observer when it is not installed, rescanning
+    the roots every `interval` seconds.
+    """
+
+    def __init__(
+        self, roots: list[Path], events: "queue.Queue[Path]", interval: float
+    ) -> None:
+        self.roots = roots
+        self.events = events
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._previous = scan(self.roots)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            current = scan(self.roots)
+            changed = {
+                path
+                for path in current.keys() | self._previous.keys()
+                if current.get(path) != self._previous.get(path)
+            }
+            self._previous = current
+            for path in changed:
+                self.events.put(Path(path))
+
+
+def make_observer(roots: list[Path], events: "queue.Queue[Path]", interval: float):
+    """
+    Returns a watchdog observer (inotify, FSEvents, ...) feeding `events` when
+    the `watchdog` package is installed, a `PollingObserver` otherwise.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return PollingObserver(roots, events, interval)
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            for path in (event.src_path, getattr(event, "dest_path", "")):
+                if path:
+                    events.put(Path(os.fsdecode(path)))
+
+    observer = Observer()
+    handler = Handler()
+    for root in roots:
+        observer.schedule(handler, str(root), recursive=True)
+    return observer
+
+
+def watch(
+    roots: list[Path],
+    on_change: Callable[[set[Path]], None],
+    debounce: float = 0.2,
+    interval: float = 0.5,
+    stop: Optional[threading.Event] = None,
+):
+    """
+    Calls `on_change` with the relevant paths changed under `roots` until
+    interrupted, once per burst of events.
+
+    :param roots: The folders to watch recursively.
+    :param on_change: Receives the changed paths of each burst.
+    :param debounce: Seconds without events that end a burst.
+    :param interval: Seconds between scans when polling.
+    :param stop: Ends the watch when set, besides KeyboardInterrupt.
+    """
+    events: "queue.Queue[Path]" = queue.Queue()
+    observer = make_observer(roots, events, interval)
+    observer.start()
+    try:
+        while stop is None or not stop.is_set():
+            try:
+                changed = {events.get(timeout=interval)}
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    changed.add(events.get(timeout=debounce))
+                except queue.Empty:
+                    break
+            if changed := {path for path in changed if is_relevant(path)}:
+                on_change(changed)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
@@ -1,5 +1,4 @@
 import importlib
-import os
 import re
 import subprocess
 import sys
@@ -8,9 +7,19 @@ from pathlib import Path
 from typing import Any, Callable, Optional
 from unicodedata import normalize
 
+from api_project_generator.core.environment import find_environment
+from api_project_generator.core.locator import find_pyproject, locate_directory
+from api_project_generator.core.manifest import load_manifest
+
 from . import strings
 from .files import Files
-from .module_helper import ModuleMapper
+from .module_helper import (
+    ModuleIndex,
+    ModuleMapper,
+    StaticModuleMapper,
+    StaticSpec,
+    _ModuleMapping,
+)
 from .repository import pypi_repository
 
 
@@ -59,11 +68,23 @@ def clean_name(string: str):
     return normalize("NFC", string.strip().replace("-", "_").lower())
 
 
+def get_curdir():
+    return Path.cwd()
+
+
 def find_directory(path: Path, dir_name: str) -> Optional[Path]:
-    for item in path.glob("**{}".format(os.sep)):
-        if item.name == dir_name:
-            return item
-    return None
+    """find_directory returns the folder dir_name of the project holding path, see core.locator.locate_directory"""
+    return locate_directory(path, dir_name)
+
+
+def register_created(
+    project_folder: Path, kind: str, name: str, module: Optional[str] = None
+):
+    """register_created records the module file created for name in the manifest of the project, see core.manifest.ProjectManifest. projects without pyproject.toml are skipped"""
+    manifest = load_manifest(project_folder, seed=True)
+    if manifest is not None:
+        manifest.register(kind, to_snake(clean_name(name)), module)
+        manifest.save()
 
 
 def to_camel(string: str):
@@ -104,47 +125,78 @@ def update_module_dunder_file(
     dunder_file: Path,
     project_folder: Path,
     inheritance_finder: Callable[[str], tuple[bool, type[Any]]],
-):
+    static_spec: Optional[StaticSpec] = None,
+    index: Optional[ModuleIndex] = None,
+) -> bool:
     """update_module_dunder_file updates imports on dunder file. inheritance finder must be a callable which receives project_folder_name and returns a tuple with is_class(bool) and parent(type).
-    if is_class is true will compare via issubclass else will use isinstance"""
+    if is_class is true will compare via issubclass else will use isinstance.
+    when static_spec is given the modules are parsed instead of imported and inheritance_finder is not called, index (static only) skips unchanged modules.
+    the file is only written when its content changes, returns whether it was written
+    """
+
+    return write_dunder_file(
+        dunder_file,
+        find_module_names(
+            dunder_file, project_folder, inheritance_finder, static_spec, index
+        ),
+    )
+
 
-    is_class, parent = inheritance_finder(project_folder.name)
-    if is_class:
-        module_mapper = ModuleMapper(
-            dunder_file.parent, project_folder, child_of=parent
+def find_module_names(
+    dunder_file: Path,
+    project_folder: Path,
+    inheritance_finder: Callable[[str], tuple[bool, type[Any]]],
+    static_spec: Optional[StaticSpec] = None,
+    index: Optional[ModuleIndex] = None,
+) -> _ModuleMapping:
+    """find_module_names returns the findings update_module_dunder_file writes to dunder_file, see it for the arguments"""
+
+    if static_spec is not None:
+        module_mapper = StaticModuleMapper(
+            dunder_file.parent, project_folder, static_spec, index
         )
     else:
-        module_mapper = ModuleMapper(
-            dunder_file.parent, project_folder, instance_of=parent
-        )
+        is_class, parent = inheritance_finder(project_folder.name)
+        if is_class:
+            module_mapper = ModuleMapper(
+                dunder_file.parent, project_folder, child_of=parent
+            )
+        else:
+            module_mapper = ModuleMapper(
+                dunder_file.parent, project_folder, instance_of=parent
+            )
     module_mapper.find()
-    findings = module_mapper.get_findings()
+    return module_mapper.get_findings()
+
+
+def write_dunder_file(dunder_file: Path, findings: _ModuleMapping) -> bool:
+    """write_dunder_file writes the imports and __all__ of findings, only when the content changes. returns whether it was written"""
+
+    content = strings.DUNDER_TEMPLATE.format(
+        imports="\n".join(findings.generate_import_string()),
+        classes=",".join('"{}"'.format(item) for item in findings.all_keys()),
+    )
+    if dunder_file.exists() and dunder_file.read_text() == content:
+        return False
     with dunder_file.open("w") as stream:
-        stream.write(
-            strings.DUNDER_TEMPLATE.format(
-                imports="\n".join(findings.generate_import_string()),
-                classes=",".join('"{}"'.format(item) for item in findings.all_keys()),
-            )
-        )
+        stream.write(content)
+    return True
 
 
-def get_env_location():
-    result = subprocess.run(["poetry", "show", "-v"], capture_output=True)
-    try:
-        result = result.stdout.decode().split("\n")[0].split()[-1]
-    except IndexError:
+def get_env_location(project_folder: Path):
+    """get_env_location returns the site-packages folders of the project environment, see core.environment.find_environment. raises ImportError when there is none"""
+    pyproject = find_pyproject(project_folder)
+    project_root = pyproject.parent if pyproject else project_folder.parent
+    environment = find_environment(project_root)
+    if environment is None:
         raise ImportError
-    else:
-        return (
-            Path(result) / "lib" / "python3.9" / "site-packages",
-            Path(result) / "lib64" / "python3.9" / "site-packages",
-        )
+    return environment.site_packages
 
 
 def prepare_to_import(project_folder: Path):
-    env_paths = get_env_location()
+    env_paths = get_env_location(project_folder)
     for item in env_paths:
-        if item.exists():
+        if item.exists() and str(item) not in sys.path:
             sys.path.append(str(item))
     sys.path.append(str(project_folder.parent))
 
@@ -182,6 +234,16 @@ def routes_inheritance_finder(_: str):
     return False, APIRouter
 
 
+# static counterparts of the inheritance finders above, used without importing
+dto_static_spec = StaticSpec(bases=frozenset({"DTO"}), calls=frozenset({"embed_array"}))
+enum_static_spec = StaticSpec(
+    bases=frozenset({"Enum", "IntEnum", "StrEnum", "Flag", "IntFlag"})
+)
+table_static_spec = StaticSpec(calls=frozenset({"Table"}))
+repo_static_spec = StaticSpec(bases=frozenset({"Repository"}))
+routes_static_spec = StaticSpec(calls=frozenset({"APIRouter"}))
+
+
 def open_in_code(name: str):
     if "win" not in sys.platform.lower():
         args = ["code", name]
@@ -1,7 +1,11 @@
+import ast
+import hashlib
 import importlib
 import inspect
+import json
+import os
 from pathlib import Path
-from typing import Any, Generic, Iterable, Optional, TypeVar
+from typing import Any, Generic, Iterable, NamedTuple, Optional, TypeVar
 
 T = TypeVar("T", bound=object)
 
@@ -134,3 +138,197 @@ class ModuleMapper(Generic[T]):
             .replace(".py", "")
         )
         return result
+
+
+class StaticSpec(NamedTuple):
+    """
+    What `StaticModuleMapper` exports: classes inheriting (directly or through
+    another exported class) from one of `bases`, and names assigned from a
+    call to one of `calls`.
+    """
+
+    bases: frozenset[str] = frozenset()
+    calls: frozenset[str] = frozenset()
+
+
+def terminal_name(node: ast.expr) -> Optional[str]:
+    """
+    Returns `Name` for both `Name` and `module.Name`, ignoring subscripts
+    such as `Generic[T]`.
+    """
+    if isinstance(node, ast.Subscript):
+        node = node.value
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def collect_definitions(tree: ast.Module):
+    """
+    Yields `(name, is_class, references)` for every top level class and every
+    top level name assigned from a call, where references are the base names
+    or the called name.
+    """
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            yield node.name, True, {terminal_name(base) for base in node.bases}
+            continue
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        if not isinstance(value, ast.Call):
+            continue
+        for target in targets:
+            if isinstance(target, ast.Name):
+                yield target.id, False, {terminal_name(value.func)}
+
+
+def parse_definitions(source: bytes, filename: str = "<unknown>"):
+    """
+    Parses `source` into `[name, is_class, references]` lists, a JSON
+    friendly form of `collect_definitions`.
+    """
+    tree = ast.parse(source, filename=filename)
+    return [
+        [name, is_class, sorted(references - {None})]
+        for name, is_class, references in collect_definitions(tree)
+    ]
+
+
+INDEX_VERSION = 1
+
+
+class ModuleIndex:
+    """
+    Remembers the definitions of every parsed module by path, mtime, size and
+    content hash, so unchanged modules are neither read nor parsed again.
+    Modules not looked up since loading are dropped on `save`.
+    """
+
+    def __init__(self, path: Path, root: Path):
+        self.path = path
+        self.root = root
+        self.parsed = 0
+        self._entries: dict[str, list] = {}
+        self._seen: dict[str, list] = {}
+        try:
+            with open(path) as stream:
+                data = json.load(stream)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self._entries = data["modules"]
+
+    def definitions(self, path: Path, stat: Optional[os.stat_result] = None):
+        key = path.relative_to(self.root).as_posix()
+        stat = stat or path.stat()
+        entry = self._entries.get(key)
+        if entry and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+            self._seen[key] = entry
+            return entry[3]
+        source = path.read_bytes()
+        digest = hashlib.blake2b(source, digest_size=16).hexdigest()
+        if entry and entry[2] == digest:
+            definitions = entry[3]
+        else:
+            definitions = parse_definitions(source, str(path))
+            self.parsed += 1
+        self._seen[key] = [stat.st_mtime_ns, stat.st_size, digest, definitions]
+        return definitions
+
+    def take_seen(self) -> dict[str, list]:
+        """
+        Returns and forgets the entries looked up so far, so the lookups made
+        by a worker process can be merged into the index of the parent.
+        """
+        seen, self._seen = self._seen, {}
+        return seen
+
+    def merge(self, entries: dict[str, list]):
+        self._seen.update(entries)
+
+    def save(self):
+        if self._seen == self._entries:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w") as stream:
+            json.dump({"version": INDEX_VERSION, "modules": self._seen}, stream)
+        os.replace(temp_path, self.path)
+
+
+class StaticModuleMapper(ModuleMapper):
+    """
+    Finds the same names as `ModuleMapper` by parsing the files with `ast`
+    instead of importing them, so module side effects never run.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        root: Path = None,
+        spec: StaticSpec = StaticSpec(),
+        index: Optional[ModuleIndex] = None,
+    ):
+        super().__init__(path, root)
+        self.spec = spec
+        self.index = index
+        self._definitions: list[tuple[str, list]] = []
+
+    def find(self):
+        super().find()
+        self._classify()
+
+    def find_from_dir(self, path: Optional[Path] = None):
+        if path is None:
+            path = self.path
+        if "pycache" in path.name:
+            return
+        # scandir entries carry their type, saving a stat per entry
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    self.find_from_dir(Path(entry.path))
+                elif entry.is_file():
+                    self._add_module(Path(entry.path), entry.stat())
+
+    def find_from_file(self, path: Optional[Path] = None):
+        if path is None:
+            path = self.path
+        if path.is_file():
+            self._add_module(path)
+
+    def _add_module(self, path: Path, stat: Optional[os.stat_result] = None):
+        if path.suffix != ".py" or "__init__" in path.name:
+            return
+        if self.index is not None:
+            definitions = self.index.definitions(path, stat)
+        else:
+            definitions = parse_definitions(path.read_bytes(), str(path))
+        self._definitions.append((self.get_import(path), definitions))
+
+    def _classify(self):
+        known = set(self.spec.bases)
+        found: dict[str, set[str]] = {source: set() for source, _ in self._definitions}
+        changed = True
+        while changed:
+            changed = False
+            for source, definitions in self._definitions:
+                for name, is_class, references in definitions:
+                    if name in found[source] or name in self.spec.bases:
+                        continue
+                    if (is_class and known.intersection(references)) or (
+                        not is_class and self.spec.calls.intersection(references)
+                    ):
+                        found[source].add(name)
+                        known.add(name)
+                        changed = True
+        # sorted like `inspect.getmembers` in `ModuleMapper`
+        for source, names in found.items():
+            for name in sorted(names):
+                self.mapping[name] = (source, None)
@@ -37,18 +37,45 @@ __all__ = ["HttpProvider", "DatabaseProvider", "DriverTypes"]
 """
 
 HTTP_PROVIDER = """import asyncio
-from contextlib import asynccontextmanager
+import json
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
 from functools import wraps
-from typing import Any, AsyncGenerator, Callable, Optional, TypeVar
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    TypeVar,
+)
 from urllib.parse import urlparse
 
+from {project_folder}.core import settings
 from {project_folder}.core.settings import logger
-from aiohttp import ClientSession, ContentTypeError
+from {project_folder}.exc import UpstreamUnavailable
+from aiohttp import (
+    ClientError,
+    ClientResponse,
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+)
+from multidict import CIMultiDict
 from typing_extensions import Concatenate, ParamSpec
 
 _Params = ParamSpec("_Params")
 _Return = TypeVar("_Return")
 
+IDEMPOTENT_METHODS = frozenset({{"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}})
+
 
 def loaded_wrapper(
     func: Callable[Concatenate["HttpProvider", _Params], _Return]
@@ -65,6 +92,233 @@ def loaded_wrapper(
     return inner
 
 
+async def gather_bounded(
+    aws: Iterable[Awaitable[_Return]], limit: int, return_exceptions: bool = False
+) -> list[_Return]:
+    # `limit` workers pull from `aws`, so a lazy iterable is only consumed
+    # as the workers free up and never lives in memory as a whole
+    results: dict[int, Any] = {{}}
+    items = enumerate(aws)
+
+    async def worker():
+        for index, aw in items:
+            try:
+                results[index] = await aw
+            except Exception as err:
+                if not return_exceptions:
+                    raise
+                results[index] = err
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(limit, 1))]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        raise
+    return [results[index] for index in range(len(results))]
+
+
+def backoff(attempt: int) -> float:
+    # exponential backoff with full jitter, so retrying clients spread out
+    ceiling = settings.HTTP_RETRY_BACKOFF * 2**attempt
+    return random.uniform(0, min(ceiling, settings.HTTP_RETRY_BACKOFF_MAX))
+
+
+class CircuitBreaker:
+    \"\"\"
+    Fails fast after `threshold` consecutive failures of a host, letting a
+    single probe through once `reset_timeout` seconds went by.
+    \"\"\"
+
+    def __init__(self, host: str, threshold: int, reset_timeout: float) -> None:
+        self.host = host
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def before_request(self):
+        state = self.state
+        if state == "open" or (state == "half-open" and self.probing):
+            raise UpstreamUnavailable(self.host)
+        self.probing = state == "half-open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.threshold and self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    def record(self, status: int):
+        if status >= 500:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def release(self):
+        # a probe that ended without an answer, cancelled or failing before
+        # reaching the host, lets the next request probe instead
+        self.probing = False
+
+
+class Response(NamedTuple):
+    status: int
+    headers: Mapping[str, str]
+    content: bytes
+
+    def body(self) -> Any:
+        # decoded on every call, so callers never share a cached object
+        content_type = self.headers.get("Content-Type", "")
+        if "json" in content_type:
+            return json.loads(self.content) if self.content.strip() else None
+        _, _, charset = content_type.partition("charset=")
+        return self.content.decode(charset.split(";")[0].strip() or "utf-8", "replace")
+
+
+class CacheEntry(NamedTuple):
+    response: Response
+    expires_at: float
+
+
+class ResponseCache:
+    \"\"\"
+    LRU of GET responses bounded by entry count and total bytes.
+
+    Entries live as long as `Cache-Control: max-age` allows, `default_ttl`
+    when the upstream does not say, and expired ones carrying an `ETag` are
+    revalidated with `If-None-Match`. Concurrent requests for the same key
+    share a single upstream fetch.
+    \"\"\"
+
+    def __init__(self, max_entries: int, max_bytes: int, default_ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.size = 0
+        self.inflight: dict[str, "asyncio.Future[Response]"] = {{}}
+        self.hits = self.misses = self.coalesced = self.revalidated = 0
+
+    @staticmethod
+    def make_key(
+        method: str,
+        url: str,
+        params: Optional[Mapping[str, Any]],
+        headers: Optional[Mapping[str, str]],
+    ) -> str:
+        # headers are part of the key, so responses to different credentials
+        # are never shared
+        return json.dumps(
+            [method.upper(), url, params or {{}}, headers or {{}}],
+            sort_keys=True,
+            default=str,
+        )
+
+    def ttl(self, headers: Mapping[str, str]) -> Optional[float]:
+        directives = {{}}
+        for item in headers.get("Cache-Control", "").lower().split(","):
+            name, _, value = item.strip().partition("=")
+            directives[name] = value.strip('"')
+        if "no-store" in directives or "private" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0
+        try:
+            return float(directives["max-age"])
+        except (KeyError, ValueError):
+            return self.default_ttl
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def discard(self, key: str):
+        if (entry := self.entries.pop(key, None)) is not None:
+            self.size -= len(entry.response.content)
+
+    def set(self, key: str, response: Response):
+        self.discard(key)
+        ttl = self.ttl(response.headers)
+        if (
+            ttl is None
+            or response.status != 200
+            or len(response.content) > self.max_bytes
+            or (ttl <= 0 and "ETag" not in response.headers)
+        ):
+            return
+        self.entries[key] = CacheEntry(response, time.monotonic() + ttl)
+        self.size += len(response.content)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted.response.content)
+
+    async def fetch(
+        self, key: str, send: Callable[[dict[str, str]], Awaitable[Response]]
+    ) -> Response:
+        \"\"\"
+        Returns the fresh entry of `key` or the response of `send`, called
+        with the revalidation headers, once for every concurrent caller.
+        \"\"\"
+        entry = self.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self.hits += 1
+            return entry.response
+        if (task := self.inflight.get(key)) is None:
+            self.misses += 1
+            # owned by the cache, a cancelled caller does not fail the others
+            task = asyncio.ensure_future(self._refresh(key, entry, send))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _refresh(
+        self,
+        key: str,
+        entry: Optional[CacheEntry],
+        send: Callable[[dict[str, str]], Awaitable[Response]],
+    ) -> Response:
+        headers = {{}}
+        if entry is not None and (etag := entry.response.headers.get("ETag")):
+            headers["If-None-Match"] = etag
+        response = await send(headers)
+        if response.status == 304 and entry is not None:
+            self.revalidated += 1
+            merged = CIMultiDict(entry.response.headers)
+            merged.update(response.headers)
+            response = entry.response._replace(headers=merged)
+        self.set(key, response)
+        return response
+
+    def stats(self) -> dict[str, int]:
+        return {{
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "revalidated": self.revalidated,
+        }}
+
+
 class HttpProvider:
     def __init__(self):
         self.loaded = False
@@ -75,6 +329,27 @@ class HttpProvider:
             return
         logger.info("Starting HTTP Session Manager")
         self.clients: dict[str, ClientSession] = {{}}
+        self.breakers: dict[str, CircuitBreaker] = {{}}
+        self.in_flight: dict[str, int] = {{}}
+        self.cache: Optional[ResponseCache] = None
+        if settings.HTTP_CACHE_MAX_ENTRIES > 0:
+            self.cache = ResponseCache(
+                settings.HTTP_CACHE_MAX_ENTRIES,
+                settings.HTTP_CACHE_MAX_BYTES,
+                settings.HTTP_CACHE_TTL,
+            )
+        # one connector for every session, so the limits hold across hosts
+        self.connector = TCPConnector(
+            limit=settings.HTTP_LIMIT,
+            limit_per_host=settings.HTTP_LIMIT_PER_HOST,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+        )
+        self.timeout = ClientTimeout(
+            total=settings.HTTP_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            sock_read=settings.HTTP_READ_TIMEOUT,
+        )
         self._get_client("http://default")
         self.loaded = True
 
@@ -82,28 +357,210 @@ class HttpProvider:
     async def finish(self):
         logger.info("Stopping HTTP Session Manager")
         await asyncio.gather(*[value.close() for value in self.clients.values()])
+        await self.connector.close()
         self.loaded = False
 
     def _get_client(self, url: str):
         name = urlparse(url).netloc
         if client := self.clients.get(name):
             return client
-        self.clients[name] = ClientSession()
+        self.clients[name] = ClientSession(
+            connector=self.connector, connector_owner=False, timeout=self.timeout
+        )
         return self.clients[name]
 
+    def _get_breaker(self, url: str) -> CircuitBreaker:
+        name = urlparse(url).netloc
+        if breaker := self.breakers.get(name):
+            return breaker
+        self.breakers[name] = CircuitBreaker(
+            name, settings.HTTP_BREAKER_THRESHOLD, settings.HTTP_BREAKER_RESET
+        )
+        return self.breakers[name]
+
+    @contextmanager
+    def _track(self, url: str) -> Iterator[None]:
+        # counted here instead of read from the connector internals, requests
+        # waiting for a free connection are in flight too
+        name = urlparse(url).netloc
+        self.in_flight[name] = self.in_flight.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            self.in_flight[name] -= 1
+            if not self.in_flight[name]:
+                del self.in_flight[name]
+
+    @loaded_wrapper
+    def stats(self) -> dict[str, Any]:
+        return {{
+            "sessions": len(self.clients),
+            "limit": self.connector.limit,
+            "limit_per_host": self.connector.limit_per_host,
+            "in_flight": sum(self.in_flight.values()),
+            "in_flight_per_host": dict(self.in_flight),
+            "circuits": {{name: item.state for name, item in self.breakers.items()}},
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }}
+
     @loaded_wrapper
     def get_client(self, url: str):
         return self._get_client(url)
 
+    async def _read(self, method: str, url: str, **kwargs) -> Response:
+        with self._track(url):
+            async with self.get_client(url).request(method, url, **kwargs) as response:
+                return Response(
+                    response.status, response.headers, await response.read()
+                )
+
+    async def _hedged(self, method: str, url: str, delay: float, **kwargs) -> Response:
+        # a second copy goes out when the first is slower than `delay`,
+        # the first one to succeed wins and the other is cancelled
+        pending = {{asyncio.ensure_future(self._read(method, url, **kwargs))}}
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            pending.add(asyncio.ensure_future(self._read(method, url, **kwargs)))
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if (error := task.exception()) is None:
+                        return task.result()
+            raise error  # type: ignore
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def fetch(
+        self, method: str, url: str, *, cache: bool = True, **kwargs
+    ) -> tuple[Any, int]:
+        \"\"\"
+        Sends the request and returns its decoded body and status, GET
+        requests go through the response cache unless `cache` is False.
+        \"\"\"
+        if not cache or self.cache is None or method.upper() != "GET":
+            response = await self._send(method, url, **kwargs)
+            return response.body(), response.status
+        headers = kwargs.pop("headers", None) or {{}}
+        key = self.cache.make_key(method, url, kwargs.get("params"), headers)
+
+        def revalidate(extra: dict[str, str]) -> Awaitable[Response]:
+            return self._send(method, url, headers={{**headers, **extra}}, **kwargs)
+
+        response = await self.cache.fetch(key, revalidate)
+        return response.body(), response.status
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        *,
+        retries: Optional[int] = None,
+        hedge_delay: Optional[float] = None,
+        **kwargs,
+    ) -> Response:
+        \"\"\"
+        Sends the request through the circuit breaker of its host, retrying
+        idempotent methods on connection errors and 5xx responses.
+
+        `retries` and `hedge_delay` default to `HTTP_RETRIES` and
+        `HTTP_HEDGE_DELAY`, both disabled with 0.
+        \"\"\"
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retries = settings.HTTP_RETRIES if retries is None else retries
+        hedge_delay = settings.HTTP_HEDGE_DELAY if hedge_delay is None else hedge_delay
+        if not idempotent:
+            retries, hedge_delay = 0, 0
+        breaker = self._get_breaker(url)
+        for attempt in range(retries + 1):
+            breaker.before_request()
+            try:
+                if hedge_delay:
+                    result = await self._hedged(method, url, hedge_delay, **kwargs)
+                else:
+                    result = await self._read(method, url, **kwargs)
+            except (ClientError, asyncio.TimeoutError):
+                breaker.record_failure()
+                if attempt == retries:
+                    raise
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                breaker.record(result.status)
+                if result.status < 500 or attempt == retries:
+                    return result
+            await asyncio.sleep(backoff(attempt))
+        raise AssertionError("unreachable")
+
     @asynccontextmanager
     async def request(
         self, method: str, url: str, **kwargs
-    ) -> AsyncGenerator[tuple[dict[str, Any], int], None]:
-        async with self.get_client(url).request(method, url, **kwargs) as response:
+    ) -> AsyncGenerator[tuple[Any, int], None]:
+        yield await self.fetch(method, url, **kwargs)
+
+    async def map_requests(
+        self,
+        requests: Iterable[tuple[str, str, dict[str, Any]]],
+        *,
+        limit: Optional[int] = None,
+        return_exceptions: bool = False,
+    ) -> list[tuple[Any, int]]:
+        return await gather_bounded(
+            (self.fetch(method, url, **kwargs) for method, url, kwargs in requests),
+            limit or settings.HTTP_CONCURRENCY,
+            return_exceptions,
+        )
+
+    @asynccontextmanager
+    async def stream(
+        self, method: str, url: str, **kwargs
+    ) -> AsyncGenerator[ClientResponse, None]:
+        breaker = self._get_breaker(url)
+        breaker.before_request()
+        with self._track(url):
             try:
-                yield (await response.json(encoding="utf8"), response.status)
-            except ContentTypeError:
-                pass
+                response = await self.get_client(url).request(method, url, **kwargs)
+            except (ClientError, asyncio.TimeoutError):
+                breaker.record_failure()
+                raise
+            except BaseException:
+                breaker.release()
+                raise
+            async with response:
+                breaker.record(response.status)
+                response.raise_for_status()
+                yield response
+
+    async def iter_chunks(
+        self, method: str, url: str, *, chunk_size: int = 65536, **kwargs
+    ) -> AsyncIterator[bytes]:
+        async with self.stream(method, url, **kwargs) as response:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+
+    async def iter_lines(
+        self, method: str, url: str, *, chunk_size: int = 65536, **kwargs
+    ) -> AsyncIterator[Any]:
+        # NDJSON, one document per line, lines of any length
+        pending = bytearray()
+        async for chunk in self.iter_chunks(
+            method, url, chunk_size=chunk_size, **kwargs
+        ):
+            start = 0
+            while (end := chunk.find(b"\\n", start)) != -1:
+                pending += chunk[start:end]
+                if pending.strip():
+                    yield json.loads(pending)
+                pending.clear()
+                start = end + 1
+            pending += chunk[start:]
+        if pending.strip():
+            yield json.loads(pending)
 
     def get(self, url: str, *, params: dict[str, Any] = None, **kwargs):
         return self.request("GET", url, params=params or {{}}, **kwargs)
@@ -124,7 +581,8 @@ class HttpProvider:
 
 DATABASE_PROVIDER = """from contextlib import asynccontextmanager, contextmanager
 import enum
-from typing import Optional
+from functools import cached_property
+from typing import Any, Optional
 
 from {project_folder}.core import settings
 from sqlalchemy.ext.asyncio import create_async_engine
@@ -138,10 +596,33 @@ class DriverTypes(enum.Enum):
         name, aio, sync = self.value
         return "{{name}}+{{driver}}".format(name=name, driver=aio if is_async else sync)
 
+    def get_connect_args(
+        self, is_async: bool, statement_timeout: int
+    ) -> dict[str, Any]:
+        if not statement_timeout:
+            return {{}}
+        if self is DriverTypes.MYSQL:
+            # MySQL only bounds the SELECT statements
+            return {{
+                "init_command": "SET SESSION max_execution_time={{}}".format(
+                    statement_timeout
+                )
+            }}
+        if is_async:
+            return {{"server_settings": {{"statement_timeout": str(statement_timeout)}}}}
+        return {{"options": "-c statement_timeout={{}}".format(statement_timeout)}}
+
 
 class DatabaseProvider:
     def __init__(self, conn_uri: Optional[str] = None) -> None:
-        self.engine, self.sync_engine = self._create_engine(conn_uri)
+        self.conn_uri = conn_uri
+        self.engine = self._create_engine(is_async=True)
+
+    @cached_property
+    def sync_engine(self):
+        # only the sync repositories use it, so async only projects never
+        # open its pool
+        return self._create_engine(is_async=False)
 
     @staticmethod
     def get_connection_uri(driver: str):
@@ -158,12 +639,21 @@ class DatabaseProvider:
     def get_driver_conn_uri(cls, driver: DriverTypes, is_async: bool):
         return cls.get_connection_uri(driver.get_driver_string(is_async))
 
-    def _create_engine(self, conn_uri: Optional[str]):
-        if conn_uri:
-            return create_async_engine(conn_uri), create_engine(conn_uri)
-        return create_async_engine(
-            self.get_driver_conn_uri(DriverTypes.{db_type}, is_async=True), pool_size=20, max_overflow=0
-        ), create_engine(self.get_driver_conn_uri(DriverTypes.{db_type}, is_async=False), pool_size=20, max_overflow=0)
+    def _create_engine(self, is_async: bool):
+        factory = create_async_engine if is_async else create_engine
+        if self.conn_uri:
+            return factory(self.conn_uri)
+        driver = DriverTypes.{db_type}
+        return factory(
+            self.get_driver_conn_uri(driver, is_async),
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            connect_args=driver.get_connect_args(
+                is_async, settings.DB_STATEMENT_TIMEOUT
+            ),
+        )
 
     @asynccontextmanager
     async def begin(self):
@@ -180,18 +670,23 @@ class DatabaseProvider:
             async with self.begin() as conn:
                 await conn.execute(text("SELECT 1"))
             return True
-        except:
-            settings.logger.exception()
+        except Exception:
+            settings.logger.exception("Database healthcheck failed")
             return False
         
     def sync_healthcheck(self):
         try:
             with self.sync() as conn:
                 conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            settings.logger.exception("Database healthcheck failed")
             return False
-        except:
-            settings.logger.exception()
-            return False
+
+    async def dispose(self):
+        await self.engine.dispose()
+        if "sync_engine" in self.__dict__:
+            self.sync_engine.dispose()
 
 
 """
@@ -220,6 +715,61 @@ DB_PASSWORD = required_env("DB_PASSWORD", dev="db-pass")
 DB_HOST = required_env("DB_HOST", dev="localhost")
 DB_PORT = environment.get("DB_PORT", dev="{db_port}", parser=int)
 
+# Each worker process holds its own pool, so an instance opens up to
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections, twice that once the
+# sync repositories are used. Keep it times the instances, counting the ones
+# started during a rollout, below the max_connections of the server.
+DB_POOL_SIZE = environment.optional("DB_POOL_SIZE", default="5", parser=int)
+DB_MAX_OVERFLOW = environment.optional("DB_MAX_OVERFLOW", default="5", parser=int)
+DB_POOL_PRE_PING = environment.optional(
+    "DB_POOL_PRE_PING", default="true", parser=Environment.bool_parser
+)
+DB_POOL_RECYCLE = environment.optional("DB_POOL_RECYCLE", default="1800", parser=int)
+# in milliseconds, 0 disables it
+DB_STATEMENT_TIMEOUT = environment.optional(
+    "DB_STATEMENT_TIMEOUT", default="0", parser=int
+)
+
+HTTP_LIMIT = environment.optional("HTTP_LIMIT", default="100", parser=int)
+HTTP_LIMIT_PER_HOST = environment.optional(
+    "HTTP_LIMIT_PER_HOST", default="20", parser=int
+)
+HTTP_KEEPALIVE_TIMEOUT = environment.optional(
+    "HTTP_KEEPALIVE_TIMEOUT", default="15", parser=float
+)
+HTTP_DNS_CACHE_TTL = environment.optional(
+    "HTTP_DNS_CACHE_TTL", default="300", parser=int
+)
+HTTP_TIMEOUT = environment.optional("HTTP_TIMEOUT", default="30", parser=float)
+HTTP_CONNECT_TIMEOUT = environment.optional(
+    "HTTP_CONNECT_TIMEOUT", default="5", parser=float
+)
+HTTP_READ_TIMEOUT = environment.optional(
+    "HTTP_READ_TIMEOUT", default="10", parser=float
+)
+HTTP_CONCURRENCY = environment.optional("HTTP_CONCURRENCY", default="10", parser=int)
+HTTP_RETRIES = environment.optional("HTTP_RETRIES", default="0", parser=int)
+HTTP_RETRY_BACKOFF = environment.optional(
+    "HTTP_RETRY_BACKOFF", default="0.1", parser=float
+)
+HTTP_RETRY_BACKOFF_MAX = environment.optional(
+    "HTTP_RETRY_BACKOFF_MAX", default="2", parser=float
+)
+HTTP_HEDGE_DELAY = environment.optional("HTTP_HEDGE_DELAY", default="0", parser=float)
+HTTP_BREAKER_THRESHOLD = environment.optional(
+    "HTTP_BREAKER_THRESHOLD", default="5", parser=int
+)
+HTTP_BREAKER_RESET = environment.optional(
+    "HTTP_BREAKER_RESET", default="30", parser=float
+)
+HTTP_CACHE_MAX_ENTRIES = environment.optional(
+    "HTTP_CACHE_MAX_ENTRIES", default="1024", parser=int
+)
+HTTP_CACHE_MAX_BYTES = environment.optional(
+    "HTTP_CACHE_MAX_BYTES", default="67108864", parser=int
+)
+HTTP_CACHE_TTL = environment.optional("HTTP_CACHE_TTL", default="0", parser=float)
+
 """
 
 LOG_FILE = """import logging
@@ -271,6 +821,10 @@ class Environment:
     def default_parser(val: str) -> str:
         return val
 
+    @staticmethod
+    def bool_parser(val: str) -> bool:
+        return val.strip().lower() in ("1", "true", "yes", "on")
+
     def _get(
         self,
         cond: bool,
@@ -313,6 +867,12 @@ class Environment:
             fallback=fallback,
         )
 
+    def optional(
+        self, key: str, *, default: str, parser: Optional[Callable[[str], T]] = None
+    ) -> T:
+        # for tuning knobs, falls back to the default without warning
+        return self._get(False, key, dev=default, parser=parser, fallback=lambda: None)
+
     def required_if(self, cond: bool):
         def _required(
             key: str,
@@ -369,7 +929,7 @@ def get_database_provider(request: Request) -> DatabaseProvider:
 """
 
 BASE_DTO_FILE = """import re
-from typing import Generic, TypeVar, TYPE_CHECKING
+from typing import Generic, Optional, TypeVar, TYPE_CHECKING
 
 from pydantic import BaseModel, create_model
 
@@ -392,10 +952,16 @@ if TYPE_CHECKING:
 
     class _EmbedArray(Generic[DTO_T]):
         data: list[DTO_T]
+        next_cursor: Optional[str]
 
 
 def embed_array(dto: "type[DTO_T]", mod: str) -> "_EmbedArray[DTO_T]":
-    return create_model(f"{dto.__qualname__}EmbedArray", __module__=mod, data=(list[dto], ...))  # type: ignore
+    return create_model(
+        f"{dto.__qualname__}EmbedArray",
+        __module__=mod,
+        data=(list[dto], ...),
+        next_cursor=(Optional[str], None),
+    )  # type: ignore
 
 """
 
@@ -419,6 +985,7 @@ EXCEPTIONS_FILE = """from starlette.status import (
     HTTP_403_FORBIDDEN,
     HTTP_404_NOT_FOUND,
     HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
 )
 
 
@@ -494,6 +1061,16 @@ class UnAuthorizedError(ApiError):
     def get_message(self) -> str:
         return "You do not have permission to use this route"
 
+
+class UpstreamUnavailable(ApiError):
+    status_code = HTTP_503_SERVICE_UNAVAILABLE
+
+    def __init__(self, host: str = "Upstream") -> None:
+        self.host = host
+
+    def get_message(self) -> str:
+        return f"{{self.host}} is unavailable"
+
 """
 
 DUNDER_EXC = """from ._exception_handlers import set_api_error_handler
@@ -505,6 +1082,7 @@ from ._exceptions import (
     AlreadyExists,
     UnexpectedError,
     UnAuthorizedError,
+    UpstreamUnavailable,
 )
 
 __all__ = [
@@ -516,6 +1094,7 @@ __all__ = [
     "AlreadyExists",
     "UnexpectedError",
     "UnAuthorizedError",
+    "UpstreamUnavailable",
 ]
 
 """
@@ -603,6 +1182,177 @@ def test_set_logger_sets_logger():
 
 """
 
+TEST_HTTP_PROVIDER = """import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from {project_folder}.{core_folder} import settings
+from {project_folder}.{exceptions_folder} import UpstreamUnavailable
+from {project_folder}.{providers_folder} import HttpProvider
+
+
+@pytest.fixture
+def calls():
+    return {{"flaky": 0, "slow": 0, "reference": 0, "etag": 0, "not_modified": 0}}
+
+
+@pytest_asyncio.fixture
+async def server(calls):
+    async def ok(request):
+        return web.json_response({{"ok": True}})
+
+    async def flaky(request):
+        calls["flaky"] += 1
+        if calls["flaky"] < 3:
+            raise web.HTTPServiceUnavailable()
+        return web.json_response({{"calls": calls["flaky"]}})
+
+    async def failing(request):
+        raise web.HTTPInternalServerError()
+
+    async def slow_once(request):
+        calls["slow"] += 1
+        call = calls["slow"]
+        if call == 1:
+            await asyncio.sleep(1)
+        return web.json_response({{"call": call}})
+
+    async def reference(request):
+        calls["reference"] += 1
+        await asyncio.sleep(0.01)
+        return web.json_response(
+            {{"reference": calls["reference"]}},
+            headers={{"Cache-Control": "max-age=60"}},
+        )
+
+    async def etag(request):
+        calls["etag"] += 1
+        headers = {{"ETag": '"v1"', "Cache-Control": "no-cache"}}
+        if request.headers.get("If-None-Match") == '"v1"':
+            calls["not_modified"] += 1
+            return web.Response(status=304, headers=headers)
+        return web.json_response({{"version": 1}}, headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/reference", reference)
+    app.router.add_get("/etag", etag)
+    app.router.add_get("/ok", ok)
+    app.router.add_route("*", "/flaky", flaky)
+    app.router.add_get("/failing", failing)
+    app.router.add_get("/slow-once", slow_once)
+    async with TestServer(app) as test_server:
+        yield test_server
+
+
+@pytest_asyncio.fixture
+async def http_provider(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_RETRY_BACKOFF", 0.001)
+    provider = HttpProvider()
+    yield provider
+    await provider.finish()
+
+
+@pytest.mark.asyncio
+async def test_retries_idempotent_requests(server, http_provider):
+    url = str(server.make_url("/flaky"))
+    assert await http_provider.fetch("GET", url, retries=2) == ({{"calls": 3}}, 200)
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_other_methods(server, http_provider, calls):
+    url = str(server.make_url("/flaky"))
+    _, status = await http_provider.fetch("POST", url, retries=2)
+    assert status == 503
+    assert calls["flaky"] == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_threshold(server, http_provider, monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_BREAKER_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "HTTP_BREAKER_RESET", 0.1)
+    url = str(server.make_url("/failing"))
+    for _ in range(2):
+        _, status = await http_provider.fetch("GET", url, retries=0)
+        assert status == 500
+    with pytest.raises(UpstreamUnavailable):
+        await http_provider.fetch("GET", str(server.make_url("/ok")), retries=0)
+    await asyncio.sleep(0.15)
+    assert await http_provider.fetch("GET", str(server.make_url("/ok"))) == (
+        {{"ok": True}},
+        200,
+    )
+    circuits = http_provider.stats()["circuits"]
+    assert circuits == {{server.make_url("/").raw_authority: "closed"}}
+
+
+@pytest.mark.asyncio
+async def test_hedges_slow_requests(server, http_provider):
+    url = str(server.make_url("/slow-once"))
+    body, _ = await asyncio.wait_for(
+        http_provider.fetch("GET", url, hedge_delay=0.05), timeout=0.5
+    )
+    assert body == {{"call": 2}}
+
+
+@pytest.mark.asyncio
+async def test_counts_requests_in_flight(server, http_provider):
+    task = asyncio.ensure_future(
+        http_provider.fetch("GET", str(server.make_url("/slow-once")), cache=False)
+    )
+    await asyncio.sleep(0.1)
+    stats = http_provider.stats()
+    assert stats["in_flight"] == 1
+    assert stats["in_flight_per_host"] == {{server.make_url("/").raw_authority: 1}}
+    await task
+    assert http_provider.stats()["in_flight_per_host"] == {{}}
+
+
+@pytest.mark.asyncio
+async def test_caches_and_coalesces_get_requests(server, http_provider, calls):
+    url = str(server.make_url("/reference"))
+    results = await asyncio.gather(
+        *(http_provider.fetch("GET", url) for _ in range(10))
+    )
+    assert results == [({{"reference": 1}}, 200)] * 10
+    assert await http_provider.fetch("GET", url) == ({{"reference": 1}}, 200)
+    assert await http_provider.fetch("GET", url, cache=False) == ({{"reference": 2}}, 200)
+    assert calls["reference"] == 2
+
+
+@pytest.mark.asyncio
+async def test_revalidates_with_etag(server, http_provider, calls):
+    url = str(server.make_url("/etag"))
+    for _ in range(3):
+        assert await http_provider.fetch("GET", url) == ({{"version": 1}}, 200)
+    assert calls["etag"] == 3
+    assert calls["not_modified"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_releases_the_circuit(server, http_provider, monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_BREAKER_THRESHOLD", 1)
+    monkeypatch.setattr(settings, "HTTP_BREAKER_RESET", 0.1)
+    url = str(server.make_url("/failing"))
+    _, status = await http_provider.fetch("GET", url, retries=0)
+    assert status == 500
+    await asyncio.sleep(0.15)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(
+            http_provider.fetch(
+                "GET", str(server.make_url("/slow-once")), retries=0, cache=False
+            ),
+            timeout=0.05,
+        )
+    assert await http_provider.fetch("GET", str(server.make_url("/ok"))) == (
+        {{"ok": True}},
+        200,
+    )
+
+"""
+
 
 MAIN_FILE = """from fastapi import FastAPI
 
@@ -621,6 +1371,7 @@ def create_startup_handler(_app: FastAPI):
 def create_shutdown_handler(_app: FastAPI):
     async def _shutdown():
         await _app.state.http_provider.finish()
+        await _app.state.database_provider.dispose()
 
     return _shutdown
 
@@ -1662,10 +2413,14 @@ class AndFilter(FilterJoins):
 
 """
 
-DATABASE_HELPERS_FILE = """from typing import TypeVar, Callable
+DATABASE_HELPERS_FILE = """import base64
+import decimal
+import json
+from typing import Any, Callable, Optional, TypeVar
 
-from sqlalchemy import Column, func
+from sqlalchemy import Column, Table, func
 from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
 
 from {project_folder}.dtos.base import DTO
 from {project_folder} import providers, exc
@@ -1673,6 +2428,9 @@ from {project_folder} import providers, exc
 
 DTO_T = TypeVar("DTO_T", bound=DTO)
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
 
 def to_dto(klass: type[DTO_T]) -> Callable[[Row], DTO_T]:
     def _to_dto(item: Row):
@@ -1731,6 +2489,61 @@ def sync_get_or_raise(
         raise exc.DoesNotExist
     return dict(result)
 
+
+def encode_cursor(value: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def cursor_types(column: Column) -> tuple[type, ...]:
+    # what a cursor of `column` may decode to, anything else is not a key
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return (str, int, float)
+    if issubclass(python_type, bool):
+        return (bool,)
+    if issubclass(python_type, int):
+        return (int,)
+    if issubclass(python_type, (float, decimal.Decimal)):
+        return (int, float)
+    return (str,)
+
+
+def decode_cursor(cursor: str, column: Optional[Column] = None) -> Any:
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as err:
+        raise exc.ApiError.from_message("Invalid cursor") from err
+    types = cursor_types(column) if column is not None else (str, int, float)
+    if not isinstance(value, types) or (
+        isinstance(value, bool) and bool not in types
+    ):
+        raise exc.ApiError.from_message("Invalid cursor")
+    return value
+
+
+def page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def paginate(
+    table: Table, query: Select, cursor: Optional[str], limit: int, key: str = "id"
+) -> Select:
+    # keyset pagination, rows after the cursor in key order plus one to
+    # know whether another page exists, never a whole table
+    column = table.c[key]
+    if cursor is not None:
+        query = query.where(column > decode_cursor(cursor, column))
+    return query.order_by(column).limit(page_size(limit) + 1)
+
+
+def page(rows: list[Row], limit: int, key: str = "id") -> dict:
+    limit = page_size(limit)
+    data = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = encode_cursor(data[-1][key]) if len(rows) > limit else None
+    return {{"data": data, "next_cursor": next_cursor}}
+
+
 class Repository:
     pass
 
@@ -1987,7 +2800,9 @@ class {dto_name}(DTO):
 
 '''
 
-ASYNC_REPOSITORY_BOILERPLATE = """from {project_folder} import exc, providers
+ASYNC_REPOSITORY_BOILERPLATE = """from typing import Optional
+
+from {project_folder} import exc, providers
 from sqlalchemy.exc import IntegrityError
 from {project_folder}.database import helpers, filters
 from {project_folder}.database.tables.{module_name} import {table_name}
@@ -2009,11 +2824,21 @@ class {entity_name}Repository(helpers.Repository):
     async def get(self, id: int):
         return await helpers.get_or_raise(self.database_provider, {table_name}, id=id)
 
-    async def list(self, *where: filters.Filter):
-        query = {table_name}.select().where(*(f.where({table_name}) for f in where))
+    async def list(
+        self,
+        *where: filters.Filter,
+        cursor: Optional[str] = None,
+        limit: int = helpers.DEFAULT_PAGE_SIZE,
+    ):
+        query = helpers.paginate(
+            {table_name},
+            {table_name}.select().where(*(f.where({table_name}) for f in where)),
+            cursor,
+            limit,
+        )
         async with self.database_provider.begin() as conn:
             result = await conn.execute(query)
-            return {{"data": list(map(dict, result.all()))}}
+            return helpers.page(result.all(), limit)
 
     async def update(self, id: int, payload: \"{module_name}.{entity_name}Edit\"):
         await helpers.get_or_raise(self.database_provider, {table_name}, id=id)
@@ -2028,7 +2853,9 @@ class {entity_name}Repository(helpers.Repository):
             await conn.execute(query)
 """
 
-SYNC_REPOSITORY_BOILERPLATE = """from {project_folder} import exc, providers
+SYNC_REPOSITORY_BOILERPLATE = """from typing import Optional
+
+from {project_folder} import exc, providers
 from sqlalchemy.exc import IntegrityError
 from {project_folder}.database import helpers, filters
 from {project_folder}.database.tables.{module_name} import {table_name}
@@ -2050,11 +2877,21 @@ class {entity_name}Repository(helpers.Repository):
     def get(self, id: int):
         return helpers.sync_get_or_raise(self.database_provider, {table_name}, id=id)
 
-    def list(self, *where: filters.Filter):
-        query = {table_name}.select().where(*(f.where({table_name}) for f in where))
+    def list(
+        self,
+        *where: filters.Filter,
+        cursor: Optional[str] = None,
+        limit: int = helpers.DEFAULT_PAGE_SIZE,
+    ):
+        query = helpers.paginate(
+            {table_name},
+            {table_name}.select().where(*(f.where({table_name}) for f in where)),
+            cursor,
+            limit,
+        )
         with self.database_provider.sync() as conn:
             result = conn.execute(query)
-            return {{"data": list(map(dict, result.all()))}}
+            return helpers.page(result.all(), limit)
 
     def update(self, id: int, payload: \"{module_name}.{entity_name}Edit\"):
         helpers.sync_get_or_raise(self.database_provider, {table_name}, id=id)
@@ -2072,7 +2909,10 @@ class {entity_name}Repository(helpers.Repository):
 
 
 ASYNC_ROUTE_BOILERPLATE = """
+from typing import Optional
+
 from fastapi import APIRouter, Body, Depends, Path, Query, Response, status
+from {project_folder}.database import helpers
 from {project_folder}.database.repositories import {entity_name}Repository
 from {project_folder}.dtos import {module_name}
 from {project_folder}.routes import dependencies
@@ -2094,11 +2934,15 @@ async def get_{entity_lower}(
 
 @{entity_lower}_router.get("/", response_model={module_name}.{entity_name}EmbedArray)
 async def list_{entity_lower}s(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE),
     database_provider: providers.DatabaseProvider = Depends(
         dependencies.get_database_provider
     ),
 ):  # add filters as query
-    return await {entity_name}Repository(database_provider).list()
+    return await {entity_name}Repository(database_provider).list(
+        cursor=cursor, limit=limit
+    )
 
 @{entity_lower}_router.post("/")
 async def create_{entity_lower}(payload: {module_name}.{entity_name}In, database_provider: providers.DatabaseProvider = Depends(dependencies.get_database_provider)):
@@ -2124,7 +2968,10 @@ async def delete_{entity_lower}(
 """
 
 SYNC_ROUTE_BOILERPLATE = """
+from typing import Optional
+
 from fastapi import APIRouter, Body, Depends, Path, Query, Response, status
+from {project_folder}.database import helpers
 from {project_folder}.database.repositories import {entity_name}Repository
 from {project_folder}.dtos import {module_name}
 from {project_folder}.routes import dependencies
@@ -2145,11 +2992,13 @@ def get_{entity_lower}(
 
 @{entity_lower}_router.get("/", response_model={module_name}.{entity_name}EmbedArray)
 def list_{entity_lower}s(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE),
     database_provider: providers.DatabaseProvider = Depends(
         dependencies.get_database_provider
     ),
 ):  # add filters as query
-    return {entity_name}Repository(database_provider).list()
+    return {entity_name}Repository(database_provider).list(cursor=cursor, limit=limit)
 
 @{entity_lower}_router.post("/")
 def create_{entity_lower}(payload: {module_name}.{entity_name}In, database_provider: providers.DatabaseProvider = Depends(dependencies.get_database_provider)):
@@ -2157,7 +3006,7 @@ def create_{entity_lower}(payload: {module_name}.{entity_name}In, database_provi
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @{entity_lower}_router.put("/{{id}}/")
-def edit_{entity_lower}(id: int = Path(...), payload: {module_name}.UserEdit = Body(...), database_provider: providers.DatabaseProvider = Depends(dependencies.get_database_provider)):
+def edit_{entity_lower}(id: int = Path(...), payload: {module_name}.{entity_name}Edit = Body(...), database_provider: providers.DatabaseProvider = Depends(dependencies.get_database_provider)):
     {entity_name}Repository(database_provider).update(id, payload)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
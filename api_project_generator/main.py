@@ -1,16 +1,14 @@
 import shutil
 from datetime import date
+from pathlib import Path
 from typing import Any, Callable, Optional, TypeVar, Union
 
 import typer
 from gyver.attrs import asdict
-from gyver.database import Driver
 
-from api_project_generator import commands
 from api_project_generator.core.config import Config, get_config, set_config
-from api_project_generator.core.user_data import GitData
 from api_project_generator.helpers.utils import prettify
-from api_project_generator.models import project_info
+from api_project_generator.models.database_driver import DatabaseDriver
 from api_project_generator.models.project_organization import ProjectOrganization
 from api_project_generator.models.version import VersionType, validate_version_format
 
@@ -18,9 +16,10 @@ from .application import get_application
 
 app = get_application()
 
-T = TypeVar("T")
+# commands import their dependencies (gyver.database, SQLAlchemy, GitPython,
+# jinja2) inside the handler, so `--help` and `config:*` stay fast
 
-config = get_config()
+T = TypeVar("T")
 
 
 def prompt_cast(
@@ -42,16 +41,36 @@ def prompt_cast(
 
 @app.command("create:api")
 def create(
-    db_driver: Optional[Driver] = typer.Option(
+    db_driver: Optional[DatabaseDriver] = typer.Option(
         None, help="The database driver to use."
     ),
-    organization: ProjectOrganization = typer.Option(
-        config.default_organization,
-        help="The organization type of the project.",
+    organization: Optional[ProjectOrganization] = typer.Option(
+        None,
+        help="The organization type of the project, defaults to the configured one.",
     ),
     open_ide: Optional[str] = typer.Option(
-        config.default_ide or None,
-        help="The IDE to open after project creation.",
+        None,
+        help="The IDE to open after project creation, defaults to the configured one.",
+    ),
+    offline: bool = typer.Option(
+        False,
+        help="Resolve dependencies only from the cache, without network access.",
+    ),
+    from_file: Optional[Path] = typer.Option(
+        None,
+        "--from-file",
+        exists=True,
+        dir_okay=False,
+        help="Create every project listed in a TOML, JSON or JSONL file.",
+    ),
+    dry_run: bool = typer.Option(
+        False, help="List the files that would be created without writing them."
+    ),
+    emit_archive: Optional[Path] = typer.Option(
+        None,
+        "--emit-archive",
+        dir_okay=False,
+        help="Write the projects to a .tar, .tar.gz, .tar.bz2, .tar.xz or .tar.zst archive instead.",
     ),
 ):
     """
@@ -59,10 +78,35 @@ def create(
 
     :param db_driver: Optional. The database driver to use. Defaults to None.
 
-    :param organization: Optional. The organization type of the project. Defaults to ProjectOrganization.STRUCTURAL.
+    :param organization: Optional. The organization type of the project. Defaults to the configured one.
 
-    :param open_ide: Optional. The IDE to open after project creation. Defaults to None.
+    :param open_ide: Optional. The IDE to open after project creation. Defaults to the configured one.
+
+    :param offline: Optional. Whether to resolve dependencies only from the cache. Defaults to False.
+
+    :param from_file: Optional. A manifest of projects to create without prompting, the IDE is not opened. Defaults to None.
+
+    :param dry_run: Optional. Whether to only list the files that would be created. Defaults to False.
+
+    :param emit_archive: Optional. An archive to write the projects to instead of the current directory. Defaults to None.
     """
+    from api_project_generator import commands
+    from api_project_generator.core.user_data import GitData
+    from api_project_generator.models import ProjectInfo
+
+    config = get_config()
+    organization = organization or config.default_organization
+    open_ide = open_ide or config.default_ide or None
+    driver = db_driver and db_driver.to_driver()
+    if from_file is not None:
+        try:
+            infos = commands.load_projects(from_file, config, driver, organization)
+        except ValueError as err:
+            typer.echo(typer.style(str(err), fg=typer.colors.RED))
+            raise typer.Exit(1) from err
+        return commands.create_apis(
+            infos, offline, config.max_concurrency, dry_run, emit_archive
+        )
     project_name = prompt_cast("Enter the project name")
     version_type = prompt_cast(
         "Enter the version format",
@@ -88,7 +132,7 @@ def create(
         config.default_pyver,
     )
 
-    info = project_info.ProjectInfo(
+    info = ProjectInfo(
         config,
         project_name,
         version,
@@ -96,11 +140,11 @@ def create(
         description,
         fullname,
         email,
-        db_driver,
+        driver,
         organization,
         pyver,
     )
-    return commands.create_api(open_ide, info)
+    return commands.create_api(open_ide, info, offline, dry_run, emit_archive)
 
 
 @app.command("cache:clear")
@@ -108,11 +152,52 @@ def clear_cache():
     """
     Clears the cache.
     """
-    cache_dir = config.cache_dir
+    cache_dir = get_config().cache_dir
     shutil.rmtree(cache_dir)
     typer.echo(f"Cache cleared at: {cache_dir}")
 
 
+@app.command("cache:export")
+def export_cache(
+    path: Path = typer.Argument(..., help="Where to write the snapshot."),
+    packages: Optional[list[str]] = typer.Option(
+        None, "--package", help="Extra packages to include in the snapshot."
+    ),
+):
+    """
+    Resolves the default dependencies and the gitignore into a portable snapshot.
+    """
+    from api_project_generator.core.cache import get_cache
+    from api_project_generator.core.dependencies import all_default_dependencies
+    from api_project_generator.core.snapshot import export_snapshot
+
+    count = export_snapshot(
+        path,
+        get_cache(),
+        all_default_dependencies() | set(packages or ()),
+        get_config().max_concurrency,
+    )
+    typer.echo(f"Exported {count} packages to: {path}")
+
+
+@app.command("cache:import")
+def import_cache(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False),
+):
+    """
+    Loads a snapshot written by cache:export, for use with create:api --offline.
+    """
+    from api_project_generator.core.cache import get_cache
+    from api_project_generator.core.snapshot import import_snapshot
+
+    try:
+        count = import_snapshot(path, get_cache())
+    except ValueError as err:
+        typer.echo(typer.style(str(err), fg=typer.colors.RED))
+        raise typer.Exit(1) from err
+    typer.echo(f"Imported {count} packages from: {path}")
+
+
 @app.command("config:change")
 def configure(
     pypi_url: Optional[str] = typer.Option(None, "--pypi-url"),
@@ -129,8 +214,9 @@ def configure(
     default_version_type: Optional[VersionType] = typer.Option(
         None, "--default-version-type"
     ),
+    max_concurrency: Optional[int] = typer.Option(None, "--max-concurrency"),
 ):
-    default_config = config
+    default_config = get_config()
     opts = {}
     if pypi_url:
         opts["pypi_url"] = pypi_url
@@ -148,6 +234,8 @@ def configure(
         opts["default_organization"] = default_organization
     if default_version_type:
         opts["default_version_type"] = default_version_type
+    if max_concurrency:
+        opts["max_concurrency"] = max_concurrency
     set_config(Config(**asdict(default_config) | opts))
 
 
@@ -156,13 +244,15 @@ def show_config():
     """
     Show the current configuration.
     """
-    config_dict = asdict(config)
+    config_dict = asdict(get_config())
     config_str = prettify(config_dict)
     typer.echo(config_str)
 
 
 @app.command("create:table")
 def create_table(table_module: str, table_name: str = typer.Argument("")):
+    from api_project_generator import commands
+
     if not table_name:
         table_name = typer.prompt("Digite o nome da tabela")
     return commands.create_table(table_module, table_name)
@@ -170,6 +260,8 @@ def create_table(table_module: str, table_name: str = typer.Argument("")):
 
 @app.command("create:dto")
 def create_dto(dto_module: str, dto_name: str = typer.Argument("")):
+    from api_project_generator import commands
+
     if not dto_name:
         dto_name = typer.prompt("Digite o nome do DTO")
     return commands.create_dto(dto_module, dto_name)
@@ -179,6 +271,8 @@ def create_dto(dto_module: str, dto_name: str = typer.Argument("")):
 def create_enum(
     enum_name: str = typer.Argument(""), auto_opts: Optional[list[str]] = None
 ):
+    from api_project_generator import commands
+
     if not enum_name:
         enum_name = typer.prompt("Digite o nome do enum")
     return commands.create_enum(enum_name, auto_opts)
@@ -186,15 +280,70 @@ def create_enum(
 
 @app.command("create:entity")
 def create_entity(
-    module: str,
+    module: str = typer.Argument(""),
     name: str = typer.Argument(""),
     sync: bool = typer.Option(False),
+    from_schema: Optional[Path] = typer.Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        help="Create every entity listed in a YAML, JSON or TOML schema.",
+    ),
 ):
+    from api_project_generator import commands
+
+    if from_schema is not None:
+        return commands.create_entities(from_schema, sync)
+    if not module:
+        module = typer.prompt("Digite o nome do módulo")
     if not name:
         name = typer.prompt("Digite o nome da entidade")
     return commands.create_entity(module, name, sync)
 
 
+@app.command("import:database")
+def import_database(
+    dsn: str = typer.Argument(..., help="A database URL or a SQLite file."),
+    module: str = typer.Option(
+        "", help="Module of the generated files, defaults to the database name."
+    ),
+    schema: Optional[str] = typer.Option(None, help="Schema to import the tables from."),
+    table: Optional[list[str]] = typer.Option(
+        None, help="Only import the tables matching these patterns."
+    ),
+    batch_size: int = typer.Option(
+        100, help="Number of tables reflected by each query.", min=1
+    ),
+    sync: bool = typer.Option(False),
+):
+    from api_project_generator import commands
+
+    return commands.import_database(dsn, module, schema, table, batch_size, sync)
+
+
 @app.command("update:imports")
-def update_imports():
-    return commands.update_imports()
+def update_imports(
+    static: bool = typer.Option(
+        False,
+        help="Parse the modules instead of importing them, no environment needed.",
+    ),
+    watch: bool = typer.Option(
+        False,
+        help="Keep running and update the packages whose modules change, implies --static.",
+    ),
+    jobs: Optional[int] = typer.Option(
+        None,
+        help="Number of processes updating the packages, defaults to one per CPU on large projects and to a single one otherwise.",
+        min=1,
+    ),
+    report: bool = typer.Option(
+        False, help="Print the time taken and names found for each package."
+    ),
+    rescan: bool = typer.Option(
+        False,
+        help="Rebuild the module registry of pyproject.toml from the project folders.",
+    ),
+):
+    from api_project_generator import commands
+
+    return commands.update_imports(static, watch, jobs, report, rescan)
@@ -1,4 +1,21 @@
-from .project_info import ProjectInfo
-from .pyproject_toml import PyprojectToml
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .project_info import ProjectInfo
+    from .pyproject_toml import PyprojectToml
 
 __all__ = ["ProjectInfo", "PyprojectToml"]
+
+# both pull gyver.database (and SQLAlchemy), so they load on first access
+# instead of whenever a lightweight sibling like `models.version` is imported
+_lazy_exports = {
+    "ProjectInfo": ".project_info",
+    "PyprojectToml": ".pyproject_toml",
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy_exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_lazy_exports[name], __name__), name)
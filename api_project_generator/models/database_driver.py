@@ -0,0 +1,19 @@
+from enum import Enum
+
+
+class DatabaseDriver(str, Enum):
+    """
+    The choices of `gyver.database.Driver`, declared here so the CLI can list
+    them without importing SQLAlchemy.
+    """
+
+    MYSQL = "mysql"
+    POSTGRES = "postgres"
+    SQLITE = "sqlite"
+    MARIADB = "mariadb"
+    CUSTOM = "custom"
+
+    def to_driver(self):
+        from gyver.database import Driver
+
+        return Driver(self.value)